@@ -57,5 +57,8 @@ class MaterialStore:
     def __iter__(self):
         yield from self._lut
 
+    def __len__(self):
+        return len(self._all)
+
     def colors(self):
         return Color.stack([m.color for m in self._all])
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 import numpy as np
 
 
@@ -16,4 +17,8 @@ class Truss:
     # list[(a, b)]
     edges: 'np.ndarray[np.uint32]'
     # list[cross_section_area]
-    areas: 'np.ndarray[np.float64]'
\ No newline at end of file
+    areas: 'np.ndarray[np.float64]'
+
+    # Extra load cases
+    # list[list[(fx, fy, fz)]] (per case, per node)
+    loads: 'Optional[np.ndarray[np.float64]]' = None
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, asdict
-from typing import Tuple, Union
+from typing import Iterable, Tuple, Union
 
 import numpy as np
 
@@ -11,6 +11,31 @@ from ..material import Material
 int3 = Tuple[int, int, int]
 
 
+@dataclass(frozen=True)
+class Layout:
+    """Storage types of the data arrays"""
+
+    material: type = np.uint32
+    strength: type = np.float64
+
+    @classmethod
+    def Compact(cls, materials: int) -> Layout:
+        """Smallest type for material ids up to {materials} & float32 strength"""
+        material = np.min_scalar_type(max(materials, 0)).type
+        return cls(material, np.float32)
+
+    @classmethod
+    def Of(cls, datas: Iterable[Data]) -> Layout:
+        """Layout holding the values of {datas} (data w/o volume is ignored)"""
+        D = [d for d in datas if not d.box.is_empty]
+        if not D:
+            return cls()
+        return cls(
+            np.result_type(*(d.material.dtype for d in D)).type,
+            np.result_type(*(d.strength.dtype for d in D)).type,
+        )
+
+
 @dataclass(eq=False)
 class Data:
     # The position & volume of the data
@@ -41,32 +66,42 @@ class Data:
             err = " All data members does not have the same shape. "
             raise AttributeError(err)
 
+    @property
+    def layout(self) -> Layout:
+        """Storage types of this data"""
+        return Layout(self.material.dtype.type, self.strength.dtype.type)
+
     @classmethod
-    def Empty(cls, box: Box) -> Data:
+    def Empty(cls, box: Box, layout: Layout = Layout()) -> Data:
         """Create a data object where all values are set to zero"""
         shape = box.shape
         return cls(
             box=box,
             mask=np.zeros(shape, np.bool_),
-            material=np.zeros(shape, np.uint32),
-            strength=np.zeros(shape, np.float64),
+            material=np.zeros(shape, layout.material),
+            strength=np.zeros(shape, layout.strength),
         )
 
     @classmethod
-    def FromMaterialGrid(cls, mat: Material, grid: np.ndarray[np.bool_]):
+    def FromMaterialGrid(cls, mat: Material, grid: np.ndarray[np.bool_], layout: Layout = Layout()):
         full = Box.OffsetShape((0, 0, 0), grid.shape)
         box = full.crop(grid)
         grid = grid[full.slice(box)]
         return cls(
             box=box,
             mask=grid,
-            material=(grid * mat.id).astype(np.uint32),
-            strength=(grid * mat.strenght).astype(np.float64),
+            material=(grid * mat.id).astype(layout.material),
+            strength=(grid * mat.strenght).astype(layout.strength),
         )
 
     def crop(self) -> Data:
         """Crop this data based on it's mask"""
-        return self[self.box.crop(self.mask)]
+        box = self.box.crop(self.mask)
+        if box.is_empty:
+            # Nothing left (slicing an empty box off the origin is not empty)
+            layout = Layout(self.material.dtype.type, self.strength.dtype.type)
+            return Data.Empty(box, layout)
+        return self[box]
 
     def offset(self, amount: "np.ndarray[np.int64]"):
         return Data(
@@ -11,9 +11,29 @@ from .operation import Operation
 Boxed = Tuple[Data, Box]
 
 
+def clear_outside(data: Data, box: Box):
+    """Zero data outside a box (slab by slab, in place)"""
+    if box.is_empty or not data.box.overlap(box):
+        for a in data.arrays():
+            a[...] = 0
+        return
+
+    S = data.box.slice(box)
+    for a in data.arrays():
+        for axis, s in enumerate(S):
+            low = [slice(None)] * 3
+            high = [slice(None)] * 3
+            low[axis] = slice(0, s.start)
+            high[axis] = slice(s.stop, None)
+            a[tuple(low)] = 0
+            a[tuple(high)] = 0
+
+
 class impl:
     __all__: Dict[Operation, impl] = {}
     OP: Operation
+    # No effect outside the child box (see clear)
+    LOCAL = True
 
     def __init_subclass__(cls, op: Operation) -> None:
         cls.OP = op
@@ -38,13 +58,17 @@ class impl:
         # Where
         M = self.where(P, C)
 
-        # Apply
+        # Apply (in place, no gathered temporaries)
         for p, c in zip(P.arrays(), C.arrays()):
-            p[M] = c[M]
+            np.copyto(p, c, where=M)
 
     def where(self, parent: Data, child: Data) -> np.ndarray[np.bool_]:
         raise NotImplementedError(f"Missing Operation: {self.OP}")
 
+    def clear(self, parent: Data):
+        """Apply to a parent region the child does not overlap"""
+        pass
+
 
 class _(impl, op=Operation.INSIDE):
     """Place the child inside the parent"""
@@ -69,43 +93,43 @@ class _(impl, op=Operation.OVERWRITE):
 
 class _(impl, op=Operation.CUTOUT):
     """Remove the child from the parent"""
+    LOCAL = False
 
     def apply(self, parent: Data, child: Data):
         # Find intersection
         B = Box.Intersection([parent.box, child.box])
 
-        # Get mask
-        M = ~(child[B].mask)
-
-        # Copy intersection data
-        D = [a[M] for a in parent[B].arrays()]
+        # Zero out parent (outside intersection)
+        clear_outside(parent, B)
+        if B.is_empty:
+            return
 
-        # Zero out parent
-        for a in parent.arrays():
-            a[...] = 0
+        # Zero out parent (where child)
+        M = child[B].mask
+        for a in parent[B].arrays():
+            np.copyto(a, a.dtype.type(0), where=M)
 
-        # Fill in intersection
-        for a, d in zip(parent[B].arrays(), D):
-            a[M] = d
+    def clear(self, parent: Data):
+        clear_outside(parent, Box.Empty())
 
 
 class _(impl, op=Operation.INTERSECT):
     """Keep only overlapping regions of parent"""
+    LOCAL = False
 
     def apply(self, parent: Data, child: Data):
         # Find intersection
         B = Box.Intersection([parent.box, child.box])
 
-        # Get mask
-        M = child[B].mask
-
-        # Copy intersection data
-        D = [a[M] for a in parent[B].arrays()]
+        # Zero out parent (outside intersection)
+        clear_outside(parent, B)
+        if B.is_empty:
+            return
 
-        # Zero out parent
-        for a in parent.arrays():
-            a[...] = 0
+        # Zero out parent (where not child)
+        M = child[B].mask
+        for a in parent[B].arrays():
+            np.multiply(a, M, out=a)
 
-        # Fill in intersection
-        for a, d in zip(parent[B].arrays(), D):
-            a[M] = d
+    def clear(self, parent: Data):
+        clear_outside(parent, Box.Empty())
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from typing import Tuple
+
+from .box import Box
+from .data import Data, Layout
+from .impl import impl
+from .node import VoxelNode
+from .operation import Operation
+
+__all__ = [
+    "LazyNode",
+]
+
+# Child operations that may be flattened into a parent of these operations
+_FLAT = (Operation.OVERWRITE, Operation.INSIDE)
+
+
+def _union(boxes: list[Box]) -> Box:
+    # Union of the boxes with volume
+    return Box.Union([b for b in boxes if not b.is_empty])
+
+
+class LazyNode:
+    """A Voxel node whose data is computed on demand
+
+    Parents keep their children (an expression) and are
+    evaluated once, over their box, when data is needed:
+
+    - children outside the evaluated region are culled
+    - nested overwrites are flattened into one pass
+    - replacing a child only recomputes that child's region
+    """
+
+    def __init__(self, op: Operation, data: Data | None = None, children: Tuple[LazyNode, ...] = ()):
+        self.op = op
+        self.children = children
+        # Leaf data (cropped) / cached parent result (over the box)
+        self.data = data
+        self.full: Data | None = None
+
+    @classmethod
+    def Leaf(cls, op: Operation, data: Data):
+        """Create a lazy node by raw data"""
+        return cls(op, data.crop())
+
+    @classmethod
+    def From(cls, node: VoxelNode):
+        """Create a lazy node by an (already computed) Voxel node"""
+        return cls(node.op, node.data)
+
+    @classmethod
+    def Parent(cls, op: Operation, nodes: list[LazyNode]):
+        """Create a lazy node by joining child nodes"""
+        return cls(op, None, tuple(_flatten(nodes)))
+
+    @property
+    def is_leaf(self):
+        return not self.children
+
+    @property
+    def box(self) -> Box:
+        """Region a parent is evaluated over"""
+        if self.is_leaf:
+            return self.data.box
+        return _union([C.bounds() for C in self.children])
+
+    @property
+    def layout(self) -> Layout:
+        """Storage types of the evaluated data (of the leaves)"""
+        return Layout.Of(self._leaves())
+
+    def _leaves(self):
+        if self.is_leaf:
+            yield self.data
+        for C in self.children:
+            yield from C._leaves()
+
+    def bounds(self) -> Box:
+        """Box of this node as a child (what its operation sees)"""
+        if self.is_leaf:
+            return self.data.box
+        # Non local operations depend on the cropped box
+        if not impl.get(self.op).LOCAL:
+            return self.evaluate().box
+        return self.box
+
+    def evaluate(self) -> Data:
+        """Join the expression to raw data"""
+        if self.is_leaf:
+            return self.data
+        if self.full is None:
+            self.full = self.render(self.box)
+        return self.full.crop()
+
+    def adopt(self, data: Data):
+        """Use already joined data as the evaluated result (ie. a shared view)"""
+        assert not self.is_leaf, "Only parents are evaluated"
+        assert data.box == self.box, "Adopted data must cover the box"
+        self.full = data
+
+    def render(self, region: Box) -> Data:
+        """Uncropped data of a region"""
+        D = Data.Empty(region, self.layout)
+        if not region.is_empty:
+            self._into(D)
+        return D
+
+    def _into(self, D: Data):
+        # Join the children inside (the box of) D
+        for C in self.children:
+            I = impl.get(C.op)
+            B = Box.Intersection([C.bounds(), D.box])
+            if B.is_empty:
+                I.clear(D)
+            elif C.is_leaf or C.full is not None or not I.LOCAL:
+                I.apply(D, C.evaluate())
+            else:
+                # Evaluate a local child only where it is used
+                I.apply(D, C.render(B))
+
+    def replace(self, index: int, node: LazyNode) -> LazyNode:
+        """Swap a child, reusing the evaluated rest of this node"""
+        children = list(self.children)
+        old = children[index]
+        children[index] = node
+        N = LazyNode(self.op, None, tuple(children))
+
+        # Nothing to reuse
+        if self.full is None or not (impl.get(old.op).LOCAL and impl.get(node.op).LOCAL):
+            return N
+
+        # Reuse the cached result, then recompute where either child was
+        B = N.box
+        if B == self.full.box:
+            D = Data(B, *(a.copy() for a in self.full.arrays()))
+        else:
+            D = Data.Empty(B, N.layout)
+            S = Box.Intersection([self.full.box, B])
+            if not S.is_empty:
+                for d, a in zip(D[S].arrays(), self.full[S].arrays()):
+                    d[...] = a
+        O = old.bounds()
+        dirty = Box.Intersection([_union([O, node.bounds()]), B])
+        if O.is_empty and index == len(children) - 1:
+            # Appended on top of the cached result
+            impl.get(node.op).apply(D, node.evaluate())
+        elif not dirty.is_empty:
+            P = D[dirty]
+            for a in P.arrays():
+                a[...] = 0
+            N._into(P)
+        N.full = D
+        return N
+
+    def materialize(self) -> VoxelNode:
+        """Compute this node as a Voxel node"""
+        return VoxelNode(self.op, self.evaluate())
+
+
+def _flatten(nodes: list[LazyNode]):
+    """Inline children of nested overwrites (same result, one pass less)
+
+    Overwrites applied one by one (last wins) equal their joined
+    result applied by overwrite or inside.
+    """
+    for N in nodes:
+        if N.is_leaf or N.op not in _FLAT or any(C.op != Operation.OVERWRITE for C in N.children):
+            yield N
+            continue
+        for C in N.children:
+            yield LazyNode(N.op, C.data, C.children)
@@ -4,7 +4,8 @@ from dataclasses import dataclass
 import numpy as np
 
 from .box import Box
-from .data import Data
+from .bricks import BrickCache, compose
+from .data import Data, Layout
 from .impl import impl
 from .operation import Operation
 
@@ -15,10 +16,15 @@ class VoxelNode:
     data: Data
 
     @staticmethod
-    def process(nodes: list[VoxelNode]) -> Data:
-        """ Join a sequence of Voxel nodes to raw data """
+    def process(nodes: list[VoxelNode], cache: BrickCache | None = None) -> Data:
+        """ Join a sequence of Voxel nodes to raw data
+
+        With a {cache}, unchanged bricks are reused between calls.
+        """
+        if cache is not None:
+            return compose([(N.op, N.data) for N in nodes], cache).crop()
         B = Box.Union([node.data.box for node in nodes])
-        D = Data.Empty(B)
+        D = Data.Empty(B, Layout.Of(node.data for node in nodes))
         for N in nodes:
             impl.get(N.op).apply(D, N.data)
         return D.crop()
@@ -34,9 +40,9 @@ class VoxelNode:
         return cls(op, data.crop())
 
     @classmethod
-    def Parent(cls, op: Operation, nodes: list[VoxelNode]):
+    def Parent(cls, op: Operation, nodes: list[VoxelNode], cache: BrickCache | None = None):
         """ Create a Voxel node by joining child nodes """
-        return cls(op, cls.process(nodes))
+        return cls(op, cls.process(nodes, cache))
 
     def offset(self, amount: 'np.ndarray[np.int64]'):
         """ Offset the voxel node by a vector [x, y, z] """
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+from .box import Box
+from .data import Data
+
+__all__ = [
+    "PackedMask",
+    "PackedData",
+]
+
+
+class PackedMask:
+    """Boolean mask stored as bits (np.packbits along the last axis)
+
+    Supports the parts of the boolean array interface
+    used by Box.crop, so boxes are cropped w/o unpacking.
+    """
+
+    def __init__(self, bits: np.ndarray[np.uint8], shape: Tuple[int, int, int]):
+        self.bits = bits
+        self.shape = shape
+
+    @classmethod
+    def Pack(cls, mask: np.ndarray[np.bool_]) -> PackedMask:
+        return cls(np.packbits(mask, axis=-1), mask.shape)
+
+    def unpack(self) -> np.ndarray[np.bool_]:
+        Z = self.shape[-1]
+        return np.unpackbits(self.bits, axis=-1, count=Z).astype(np.bool_)
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def any(self, axis: int | Tuple[int, ...] | None = None):
+        """Reduce like ndarray.any (the packed axis is OR-ed bytewise)"""
+        last = self.bits.ndim - 1
+        if axis is None:
+            return bool(self.bits.any())
+        axes = axis if isinstance(axis, tuple) else (axis,)
+        if last in axes:
+            # Packed axis is reduced, any set byte will do
+            return (self.bits != 0).any(axis=axes)
+        # Keep the packed axis: combine bits, then unpack
+        bits = np.bitwise_or.reduce(self.bits, axis=axes)
+        return np.unpackbits(bits, axis=-1, count=self.shape[-1]).astype(np.bool_)
+
+
+class PackedData:
+    """Compact (at rest) form of Data: bit mask & the layout types"""
+
+    def __init__(self, box: Box, mask: PackedMask, material: np.ndarray, strength: np.ndarray):
+        self.box = box
+        self.mask = mask
+        self.material = material
+        self.strength = strength
+
+    @classmethod
+    def Pack(cls, data: Data) -> PackedData:
+        """Pack a copy of the data (in its own layout)"""
+        return cls(
+            data.box,
+            PackedMask.Pack(data.mask),
+            data.material.copy(),
+            data.strength.copy(),
+        )
+
+    def unpack(self) -> Data:
+        return Data(self.box, self.mask.unpack(), self.material, self.strength)
+
+    def crop(self) -> Box:
+        """The cropped box (w/o unpacking the mask)"""
+        return self.box.crop(self.mask)  # type: ignore
+
+    @property
+    def nbytes(self):
+        return self.mask.nbytes + self.material.nbytes + self.strength.nbytes
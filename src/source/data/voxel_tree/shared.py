@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import io
+import pickle
+import weakref
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from .box import Box
+from .data import Data
+
+__all__ = [
+    "SharedData",
+    "SharedObject",
+]
+
+# (name, shape, dtype) per data array
+Block = Tuple[str, Tuple[int, ...], str]
+
+# Attached blocks must outlive the arrays viewing them
+__attached__: Dict[str, SharedMemory] = {}
+
+# Blocks published by this process (viewed w/o attaching again)
+__owned__: Dict[str, SharedMemory] = {}
+
+# Block of each attached array (by id, while it is alive)
+__views__: Dict[int, Block] = {}
+
+
+def _attach(name: str) -> SharedMemory:
+    if name in __owned__:
+        return __owned__[name]
+    if name not in __attached__:
+        __attached__[name] = SharedMemory(name=name)
+    return __attached__[name]
+
+
+def _publish(a: np.ndarray) -> Tuple[SharedMemory, Block]:
+    # Zero sized blocks are not allowed
+    shm = SharedMemory(create=True, size=max(a.nbytes, 1))
+    view = np.ndarray(a.shape, a.dtype, buffer=shm.buf)
+    view[...] = a
+    __owned__[shm.name] = shm
+    return shm, (shm.name, a.shape, a.dtype.str)
+
+
+def _close(shm: SharedMemory):
+    try:
+        shm.close()
+    except BufferError:
+        # Still viewed, unmapped once the last view is gone
+        pass
+
+
+def _free(shm: SharedMemory):
+    # Unlink a published block & close every map of it
+    __owned__.pop(shm.name, None)
+    if attached := __attached__.pop(shm.name, None):
+        _close(attached)
+    _close(shm)
+    shm.unlink()
+
+
+def _view(block: Block) -> np.ndarray:
+    name, shape, dtype = block
+    a = np.ndarray(shape, np.dtype(dtype), buffer=_attach(name).buf)
+    a.flags.writeable = False
+    __views__[id(a)] = block
+    weakref.finalize(a, __views__.pop, id(a), None)
+    return a
+
+
+class SharedData:
+    """Data published once into shared memory blocks
+
+    The handle is small to pickle, other processes
+    attach to the blocks by name to get a zero-copy
+    (read only) Data view instead of their own copy.
+
+    """
+
+    def __init__(self, box: Box, blocks: Tuple[Block, ...]):
+        self.box = box
+        self.blocks = blocks
+        self._owned: list[SharedMemory] = []
+
+    @classmethod
+    def Publish(cls, data: Data) -> SharedData:
+        """Copy the data arrays into new shared memory blocks"""
+        owned: list[SharedMemory] = []
+        blocks: list[Block] = []
+        for a in data.arrays():
+            shm, block = _publish(a)
+            owned.append(shm)
+            blocks.append(block)
+        shared = cls(data.box, tuple(blocks))
+        shared._owned = owned
+        return shared
+
+    def attach(self) -> Data:
+        """Zero-copy Data view of the shared blocks"""
+        mask, material, strength = map(_view, self.blocks)
+        return Data(self.box, mask, material, strength)
+
+    def release(self):
+        """Free the blocks (only by the publisher)"""
+        for shm in self._owned:
+            _free(shm)
+        self._owned = []
+
+    def __getstate__(self):
+        return {"box": self.box, "blocks": self.blocks}
+
+    def __setstate__(self, state):
+        self.box = state["box"]
+        self.blocks = state["blocks"]
+        self._owned = []
+
+
+class _Pickler(pickle.Pickler):
+    # Large arrays go to shared memory blocks (shared views are referenced)
+
+    def __init__(self, file, threshold: int):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.threshold = threshold
+        self.owned: list[SharedMemory] = []
+
+    def persistent_id(self, obj):
+        if type(obj) is not np.ndarray or obj.dtype.hasobject or obj.nbytes < self.threshold:
+            return None
+        if id(obj) in __views__:
+            return __views__[id(obj)]
+        shm, block = _publish(obj)
+        self.owned.append(shm)
+        return block
+
+
+class _Unpickler(pickle.Unpickler):
+
+    def persistent_load(self, pid):
+        return _view(pid)
+
+
+class SharedObject:
+    """An object pickled once w/ its (large) arrays in shared memory blocks
+
+    Attaching unpickles the object around zero-copy (read only)
+    array views, arrays attached from other shared handles are
+    referenced by their blocks instead of copied again.
+
+    """
+
+    def __init__(self, blob: bytes):
+        self.blob = blob
+        self._owned: list[SharedMemory] = []
+
+    @classmethod
+    def Publish(cls, obj: Any, threshold: int = 1 << 12) -> SharedObject:
+        """Pickle the object, copying arrays of at least {threshold} bytes into new blocks"""
+        file = io.BytesIO()
+        pickler = _Pickler(file, threshold)
+        pickler.dump(obj)
+        shared = cls(file.getvalue())
+        shared._owned = pickler.owned
+        return shared
+
+    def attach(self) -> Any:
+        """Unpickle the object w/ views of the shared blocks"""
+        return _Unpickler(io.BytesIO(self.blob)).load()
+
+    def release(self):
+        """Free the blocks (only by the publisher)"""
+        for shm in self._owned:
+            _free(shm)
+        self._owned = []
+
+    def __getstate__(self):
+        return {"blob": self.blob}
+
+    def __setstate__(self, state):
+        self.blob = state["blob"]
+        self._owned = []
@@ -2,17 +2,22 @@ import source.utils.types as t
 from .material import Material
 import numpy as np
 
-class Voxels:
+
+class Constraints:
+    """ Physical constraints per material (shared by voxel backends) """
 
     def __init__(self, shape: t.int3):
         self.shape = shape
-        self.grid = np.zeros(shape, np.uint32)
-        self.strength = np.zeros(shape, np.float64)
+        # Global position of the grid origin
+        self.offset: t.int3 = (0, 0, 0)
         self.forces = dict[Material, t.float3]()
         self.statics = dict[Material, t.bool3]()
-        
-    def get_material(self, material: Material):
-        return self.grid == material.id
+        # Extra load cases (case -> forces)
+        self.loads = dict[str, dict[Material, t.float3]]()
+
+    def materials(self) -> 'np.ndarray[np.uint32]':
+        """ Material ids of the voxels (any layout) """
+        raise NotImplementedError()
 
     def set_static(self, material: Material, locks: t.bool3):
         self.statics[material] = locks
@@ -21,19 +26,101 @@ class Voxels:
         self.forces[material] = force
 
     def static_map(self):
-        L = np.max(self.grid) + 1
+        L = np.max(self.materials(), initial=0) + 1
         static = np.zeros((L, 3), np.bool_)
         for material, locks in self.statics.items():
             static[material.id, :] = locks
         return static
 
-    def force_map(self):
-        L = np.max(self.grid) + 1
+    def force_map(self, forces: 'dict[Material, t.float3] | None' = None):
+        L = np.max(self.materials(), initial=0) + 1
         static = np.zeros((L, 3), np.float64)
-        for material, force in self.forces.items():
+        if forces is None:
+            forces = self.forces
+        for material, force in forces.items():
             static[material.id, :] = force
             # Number of voxels
             # count = np.count_nonzero(self.grid == material.id) # type: ignore
             # Inverse proportional force
             # static[material.id, :] = np.divide(force, count)
         return static
+
+    def load_maps(self):
+        """ Force map per extra load case [case, material, axis] """
+        L = np.max(self.materials(), initial=0) + 1
+        maps = [self.force_map(forces) for forces in self.loads.values()]
+        return np.stack(maps) if maps else np.zeros((0, L, 3), np.float64)
+
+
+class Voxels(Constraints):
+    """ Dense voxel grid (material & strength per cell) """
+
+    def __init__(self, shape: t.int3):
+        super().__init__(shape)
+        self.grid = np.zeros(shape, np.uint32)
+        self.strength = np.zeros(shape, np.float64)
+
+    def materials(self):
+        return self.grid
+
+    def get_material(self, material: Material):
+        return self.grid == material.id
+
+    def sparse(self):
+        """ Occupied voxels only """
+        index = np.flatnonzero(self.grid)
+        S = SparseVoxels(self.shape, index, self.grid.flat[index], self.strength.flat[index])
+        S.offset = self.offset
+        S.forces = self.forces
+        S.statics = self.statics
+        S.loads = self.loads
+        return S
+
+
+class SparseVoxels(Constraints):
+    """ Occupied voxels only, by sorted linear (C order) index
+
+    Memory & neighbour lookups scale w/ the occupied voxels
+    instead of the bounding volume (thin structures in big boxes).
+    """
+
+    def __init__(self, shape: t.int3, index: 'np.ndarray[np.int64]', material: 'np.ndarray[np.uint32]', strength: 'np.ndarray[np.float64]'):
+        super().__init__(shape)
+        self.index = np.asarray(index, np.int64)
+        self.material = np.asarray(material, np.uint32)
+        self.strength = np.asarray(strength, np.float64)
+        assert self.index.shape == self.material.shape == self.strength.shape
+        assert np.all(self.index[1:] > self.index[:-1]), "Index must be sorted & unique"
+
+    def materials(self):
+        return self.material
+
+    def get_material(self, material: Material):
+        return self.material == material.id
+
+    def coords(self) -> 'np.ndarray[np.int64]':
+        """ Voxel coordinates [N, (x, y, z)] """
+        return np.vstack(np.unravel_index(self.index, self.shape)).T
+
+    def lookup(self, coords: 'np.ndarray[np.int64]') -> 'np.ndarray[np.int64]':
+        """ Position of voxels by coordinate (-1 if empty / outside) """
+        coords = np.asarray(coords, np.int64)
+        inside = np.all((coords >= 0) & (coords < self.shape), axis=1)
+        P = np.full(coords.shape[0], -1, np.int64)
+        if not self.index.size:
+            return P
+        K = np.ravel_multi_index(tuple(coords[inside].T), self.shape)
+        I = np.minimum(np.searchsorted(self.index, K), self.index.size - 1)
+        P[inside] = np.where(self.index[I] == K, I, -1)
+        return P
+
+    def dense(self):
+        """ Dense voxel grid """
+        V = Voxels(self.shape)
+        V.grid.flat[self.index] = self.material
+        V.strength.flat[self.index] = self.strength
+        V.offset = self.offset
+        V.forces = self.forces
+        V.statics = self.statics
+        V.loads = self.loads
+        return V
@@ -12,6 +12,7 @@ import source.interactive.scene as s
 import source.data.voxel_tree.node as n
 import source.math.voxels2truss as v2t
 import source.math.truss2stress as fem
+import source.math.solvers as sv
 
 from source.utils.shapes import line_cube
 from source.utils.wireframe.deformation import DeformationWireframe
@@ -72,6 +73,18 @@ class Config(p.Struct):
     # Random Seed
     seed: p.Int
 
+    # Sparse solver backend (see source.math.solvers)
+    solver: p.String
+
+    # Worker processes for fitness evaluation (0 | 1 -> serial)
+    workers: p.Int
+
+    # Fitness cache budget in bytes (0 -> disabled, main process only)
+    cache: p.Int
+
+    # Compact voxel storage (small material ids, float32 strength)
+    compact: p.Bool
+
     def postParse(self) -> None:
         if name := self.output.get():
             self.folderName = name
@@ -116,7 +129,7 @@ class Config(p.Struct):
         # return the scene
         return s.Scene(matrix, [bbox])
 
-    def buildContext(self):
+    def buildContext(self, layout: n.Layout = n.Layout()):
         # Requested not to build
         if not self.mode._build:
             return None
@@ -126,7 +139,7 @@ class Config(p.Struct):
         if B.is_empty:
             return None
         # Create context
-        return Context(B)
+        return Context(B, layout)
 
 
 class Population(p.Struct):
@@ -236,6 +249,7 @@ class Configuration(p.Struct):
         V.strength = D.strength
         V.forces = M.forces
         V.statics = M.statics
+        V.loads = M.loads
         # Return
         return V
 
@@ -245,9 +259,15 @@ class Configuration(p.Struct):
     def scene(self, TQ: TaskQueue):
         return TQ.dispatch(self.config.buildScene)()
 
+    def layout(self):
+        """Storage layout of new voxel data"""
+        if self.config.compact.getOr(False):
+            return n.Layout.Compact(len(self.materials.get()))
+        return n.Layout()
+
     def voxels(self):
         # Not configured for voxels
-        ctx = self.config.buildContext()
+        ctx = self.config.buildContext(self.layout())
         if ctx is None:
             print("Cannot build voxels")
             return
@@ -304,7 +324,7 @@ class Configuration(p.Struct):
         # Make mesh
         M = m.Mesh(T.nodes, T.edges, m.Geometry.Lines)
         # Simulate Truss
-        D, _ = fem.fem_simulate(T, 1e3)
+        D, _ = fem.fem_simulate(T, 1e3, sv.shared(self.config.solver.get()))
 
         # simulation failed
         if not D:
@@ -334,7 +354,7 @@ class Configuration(p.Struct):
         if not self.config.mode._run:
             return
 
-        ctx = self.config.buildContext()
+        ctx = self.config.buildContext(self.layout())
         if not ctx:
             return
 
@@ -357,12 +377,18 @@ class Configuration(p.Struct):
             material=P.material.get(),
             op=P.operation.require(),
             node=node,
+            layout=ctx.layout,
             forces=M.forces,
             statics=M.statics,
+            loads=M.loads,
+            aggregate=P.aggregate.getOr('max'),
             size=size,
             keep=keep,
             mutations=mut,
             seed=self.config.seed.get(),
+            solver=self.config.solver.get(),
+            workers=self.config.workers.getOr(0),
+            cache=self.config.cache.getOr(1 << 20),
             folder=os.path.join(folder, self.config.folderName),
         )
 
@@ -371,6 +397,8 @@ class Configuration(p.Struct):
 
         # Check if unset or invalid
         if not G or G.config != C:
+            if G:
+                G.close()
             G = ga.GA(C)
             self.cache().ga.set(G)
 
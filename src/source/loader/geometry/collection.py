@@ -5,6 +5,9 @@ from source.utils.wireframe.origin import Origin
 
 from .geometry import Geometry, Context
 
+# Composed voxel bricks (by content, shared by all collections)
+__bricks__ = n.BrickCache()
+
 
 class GeometryCollection(Geometry, type='collection'):
     """ Compose Geometry from child instances """
@@ -60,8 +63,8 @@ class GeometryCollection(Geometry, type='collection'):
             L = [G.buildVoxels(ctx) for G in self if G.voxels.getOr(True)]
             # Get Operation
             O = self.operation.require()
-            # Build Voxels
-            N = n.VoxelNode.Parent(O, L)
+            # Build Voxels (reusing unchanged bricks)
+            N = n.VoxelNode.Parent(O, L, __bricks__)
             # cache node
             self.__node = N
 
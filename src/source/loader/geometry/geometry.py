@@ -30,10 +30,13 @@ def void_on_error(method):
 
 class Context:
 
-    def __init__(self, box: b.Box):
+    def __init__(self, box: b.Box, layout: n.Layout = n.Layout()):
         # store box (TODO: __box)
         self.box = box
 
+        # storage layout of new voxel data
+        self.layout = layout
+
         # store shape
         self.shape = box.shape
 
@@ -48,14 +51,15 @@ class Context:
         # anything outside the bounds
 
     def push(self, mat: glm.mat4):
-        new = Context(self.box)
+        new = Context(self.box, self.layout)
         new.matrix = self.matrix * mat
         return new
 
     def eq(self, other: 'Context'):
         return (
             self.shape == other.shape and
-            self.matrix == other.matrix
+            self.matrix == other.matrix and
+            self.layout == other.layout
         )
 
     def finalize(self, node: n.VoxelNode):
@@ -6,20 +6,27 @@ import source.data.voxel_tree.node as n
 import source.parser.all as p
 import source.data.mesh as m
 
-from source.math.mesh2voxels import mesh_to_voxels
+from source.math.mesh2voxels import mesh_to_voxels, VERSION
 from source.utils.mesh_loader import cacheMesh
+from source.utils.voxel_cache import VoxelCache
 
 from .geometry import Context, Geometry
 
 
 class Mesh(Geometry, type='mesh'):
     file: p.String
+    # Rasterize along one axis (winding number where it is inconsistent)
+    single: p.Bool
+    # Keep voxels on disk (across restarts & workers)
+    cache: p.Bool
+    __file: str
     __mesh: m.Mesh
     __node: n.VoxelNode
 
     def postParse(self):
         file = self.file.require()
         file = os.path.abspath(file)
+        self.__file = file
 
         try:
             # Get or Load mesh
@@ -30,6 +37,20 @@ class Mesh(Geometry, type='mesh'):
     def getMesh(self) -> m.Mesh:
         return self.__mesh
 
+    def getVoxels(self, ctx: Context):
+        single = self.single.getOr(False)
+        if not self.cache.getOr(True):
+            return mesh_to_voxels(self.__mesh, ctx.matrix, ctx.shape, single)
+
+        C = VoxelCache()
+        K = C.key(self.__file, ctx.matrix, ctx.shape, VERSION, single)
+        G = C.get(K, ctx.shape)
+        if G is None:
+            G = mesh_to_voxels(self.__mesh, ctx.matrix, ctx.shape, single)
+            if G is not None:
+                C.put(K, G)
+        return G
+
     def buildVoxels(self, ctx: Context) -> n.VoxelNode:
         # Cache context
         ctx, old = self._cacheCtx(ctx)
@@ -39,16 +60,17 @@ class Mesh(Geometry, type='mesh'):
             or self.file.hasChanged()
             or self.operation.hasChanged()
             or self.material.hasChanged()
+            or self.single.hasChanged()
         )
 
         # Compute if changed
         if changed:
-            # Compute voxels
-            G = mesh_to_voxels(self.__mesh, ctx.matrix, ctx.shape)
+            # Load or compute voxels
+            G = self.getVoxels(ctx)
             # Get material
             M = self.material.get()
             # Package Data
-            D = n.Data.FromMaterialGrid(M, G)
+            D = n.Data.FromMaterialGrid(M, G, ctx.layout)
             # Get operation
             O = self.operation.require()
             # Return node
@@ -35,8 +35,7 @@ class Sphere(Geometry, type='sphere-old'):
             # Compute
             O = self.operation.require()
             M = self.material.get()
-            G = field.compute(ctx.shape, ctx.matrix, 1.0)
-            D = n.Data.FromMaterialGrid(M, G)
+            D = field.voxelize(M, ctx.shape, ctx.matrix, 1.0, ctx.layout)
             N = n.VoxelNode.Leaf(O, D)
 
             # Cache
@@ -67,8 +66,7 @@ class Sphere2(Geometry, type='sphere'):
             # Compute
             O = self.operation.require()
             M = self.material.get()
-            G = field.compute(ctx.shape, ctx.matrix, 1.0)
-            D = n.Data.FromMaterialGrid(M, G)
+            D = field.voxelize(M, ctx.shape, ctx.matrix, 1.0, ctx.layout)
             N = n.VoxelNode.Leaf(O, D)
 
             # Cache
@@ -12,11 +12,17 @@ class Locks(NamedTuple):
     z: bool = False
 
 
+class Loads(p.Map[Vec3]):
+    """ Named load cases (case -> force) """
+    generic = Vec3
+
+
 class Material(p.Struct):
     color: Color
     strength: p.Float
     locks: p.Value[Locks]
     force: Vec3
+    loads: Loads
 
 
 class MaterialKey(p.String):
@@ -47,12 +53,14 @@ class MaterialStore(p.Map[Material]):
     store: m.MaterialStore
     forces: dict[m.Material, t.float3]
     statics: dict[m.Material, t.bool3]
+    loads: dict[str, dict[m.Material, t.float3]]
 
     def postParse(self):
         # New caches
         store = m.MaterialStore()
         forces = dict[m.Material, t.float3]()
         statics = dict[m.Material, t.bool3]()
+        loads = dict[str, dict[m.Material, t.float3]]()
 
         # PINK = m.Color(255 / 255, 192 / 255, 203 / 255, 1000)
 
@@ -83,10 +91,16 @@ class MaterialStore(p.Map[Material]):
             if L := V.locks.get():
                 statics[M] = (L.x, L.y, L.z)
 
+            # Bind extra load cases
+            for case, F in V.loads:
+                if F := F.get():
+                    loads.setdefault(case, {})[M] = (F.x, F.y, F.z)
+
         # Save caches
         self.store = store
         self.forces = forces
         self.statics = statics
+        self.loads = loads
 
     def get(self):
         return self.store
@@ -99,4 +113,8 @@ class MaterialStore(p.Map[Material]):
         # {store} does not contribute here ...
         # as we're interested in other changes
 
-        return self.forces == o.forces and self.statics == o.statics
+        return (
+            self.forces == o.forces
+            and self.statics == o.statics
+            and self.loads == o.loads
+        )
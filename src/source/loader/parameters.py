@@ -57,6 +57,9 @@ class Parameters(p.Struct):
     # Voxel operation
     operation: g.Operation
 
+    # Fitness combination across load cases (max | mean | sum)
+    aggregate: p.String
+
     def loadMaterial(self, store: m.m.MaterialStore):
         with self.captureErrors():
             self.material.load(store)
@@ -85,13 +88,11 @@ class Parameters(p.Struct):
         )
         # get width
         width = self.width.getOr(1.0)
-        # compute voxels
-        G = F.compute(ctx.shape, ctx.matrix, width)
         # get material
         M = self.material.get()
         # get operation
         O = self.operation.require()
-        # box data
-        D = n.Data.FromMaterialGrid(M, G)
+        # box data (voxels inside the field bounds)
+        D = F.voxelize(M, ctx.shape, ctx.matrix, width, ctx.layout)
         # Operation
         return n.VoxelNode.Leaf(O, D)
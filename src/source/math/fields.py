@@ -1,9 +1,15 @@
 # pyright: reportSelfClsParameterName=false
 import typing as t
+from copy import copy
+from functools import lru_cache
+from itertools import product
 import numpy as np
 import glm
 
 from source.utils.types import Array, F, B, I, int3
+from source.data.voxel_tree.box import Box
+from source.data.voxel_tree.data import Data, Layout
+from source.data.material import Material
 import source.graphics.matrices as mat
 
 
@@ -15,26 +21,41 @@ class _(t.Any):
     # Shorthand for newaxis
     ex = np.newaxis
 
-    def coords(*shape: int):
-        # Ranges
-        R = (np.arange(l) for l in shape)
-        # Grids (can numpy fix meshgrid typing ....)
-        G = np.meshgrid(*R)  # type: ignore
-        # Unraveled
-        U = tuple(np.ravel(i) for i in G)
-        # Joined
-        return np.vstack(U).astype(np.int64)
+    def centers(low: int, high: int) -> Array[F]:
+        # Voxel centers along an axis (shared, read only)
+        return _centers(int(low), int(high))
+
+    def lattice(box: Box, matrix: glm.mat4) -> Array[F]:
+        """ Voxel centers of a box by an affine (3, *shape) float32
+
+        The transform is separable: each axis contributes
+        a broadcast term, no coordinate array is built.
+        """
+        T = mat.to_affine(matrix).astype(np.float32)
+        X, Y, Z = (_.centers(l, h) for l, h in zip(box.start, box.stop))
+        ex = _.ex
+        # Small partial sums first, one full size add last
+        P = T[:, 0, ex, ex, ex] * X[ex, :, ex, ex]
+        P = P + T[:, 1, ex, ex, ex] * Y[ex, ex, :, ex]
+        P = P + T[:, 3, ex, ex, ex]
+        return P + T[:, 2, ex, ex, ex] * Z[ex, ex, ex, :]
 
     def point(x: float, y: float, z: float):
-        return np.array([x, y, z], dtype=np.float64)
+        return np.array([x, y, z], dtype=np.float32)
 
     def fix_point(p: V):
         return _.point(*p)
 
     def row_dot(P: Array[F], p: Array[F]) -> Array[F]:
-        """ Row-wise dot product """
+        """ Row-wise dot product (batched: (3, K, N) & (3, K)) """
+        if P.ndim == 3:
+            return np.einsum('ikj,ik->kj', P, p)  # type: ignore
         return np.einsum('ij,i->j', P, p)  # type: ignore
 
+    def sqr_len(p: Array[F]) -> Array[F]:
+        # Squared length of point(s), broadcast against rows
+        return np.sum(p * p, axis=0)[..., _.ex]
+
     def sqr_norm(P: Array[F]) -> Array[F]:
         return np.sum(P * P, axis=0)
 
@@ -46,34 +67,139 @@ class _(t.Any):
         return P.shape == (3,)
 
     def is_points(P: Array[F]):
-        return len(P.shape) == 2 and P.shape[0] == 3
+        return len(P.shape) in (2, 3) and P.shape[0] == 3
 
     def less(P: Array[F], W: float) -> Array[B]:
         return P < W  # type: ignore
 
 
+@lru_cache(maxsize=64)
+def _centers(low: int, high: int) -> Array[F]:
+    C = np.arange(low, high, dtype=np.float32) + np.float32(0.5)
+    C.flags.writeable = False
+    return C
+
+
+def _groups(size: Array[I], tile: int, slack: float):
+    """ (indices, common shape) of volumes to evaluate together """
+    volume = np.prod(size, axis=1)
+    order = list(np.argsort(-volume, kind='stable'))
+    while order:
+        J = [order.pop(0)]
+        S = size[J[0]]
+        need = volume[J[0]]
+        # Add the next smaller volumes while padding stays cheap
+        while order:
+            k = order[0]
+            R = np.maximum(S, size[k])
+            padded = int(np.prod(R)) * (len(J) + 1)
+            if padded > tile or padded > slack * (need + volume[k]):
+                break
+            J.append(order.pop(0))
+            S = R
+            need += volume[k]
+        yield np.array(J), S
+
+
 class Field:
-    """ Abstract Base field """
+    """ Abstract Base field
+
+    Points may be batched: (3, K) points describe K volumes
+    (ie. Cylinder(A.T, B.T)), see crop_all.
+    """
 
     def field(self, P: Array[F]) -> Array[F]: ...
 
-    def compute(self, shape: int3, matrix: glm.mat4, width: float):
-        # Centered coords
-        C = _.coords(*shape) + 0.5
-        # Inverse affine matrix
-        T = mat.to_affine(glm.affineInverse(matrix))
-        # mat3
-        M = T[:, :3]
-        # vec3
-        V = T[:, 3:]
-        # Transform coords
-        P = (M @ C) + V
+    def bounds(self, width: float) -> tuple[Array[F], Array[F]]:
+        """ Conservative (low, high) corners of the volume """
+        raise NotImplementedError(f"{self.__class__.__name__}.bounds()")
+
+    def regions(self, shape: int3, matrix: glm.mat4, width: float) -> tuple[Array[I], Array[I]]:
+        """ (low, high) voxels of {shape} that may be inside the volume(s) """
+        L, H = self.bounds(width)
+        # Corners to voxel space (8, 3, ...)
+        C = np.array(list(product(*zip(L, H))))
+        T = mat.to_affine(matrix)
+        P = np.einsum('ij,cj...->ci...', T[:, :3], C)
+        P += T[:, 3].reshape((3,) + (1,) * (C.ndim - 2))
+        # Voxels w/ a center inside
+        low = np.floor(P.min(axis=0)).astype(np.int64)
+        high = np.ceil(P.max(axis=0)).astype(np.int64) + 1
+        S = np.array(shape, np.int64).reshape((3,) + (1,) * (C.ndim - 2))
+        return np.clip(low, 0, S), np.clip(high, 0, S)
+
+    def region(self, shape: int3, matrix: glm.mat4, width: float) -> Box:
+        """ Voxels of {shape} that may be inside the volume """
+        return Box(*self.regions(shape, matrix, width))
+
+    def crop(self, shape: int3, matrix: glm.mat4, width: float) -> tuple[Box, Array[B]]:
+        """ Voxel grid of the region (only voxels in bounds are evaluated) """
+        R = self.region(shape, matrix, width)
+        if R.is_empty:
+            return R, np.zeros(R.shape, np.bool_)
+        # Voxel centers (field space, C order of the region)
+        P = _.lattice(R, glm.affineInverse(matrix)).reshape(3, -1)
         # Get distance field
         D = self.field(P)
         # To voxel grid
-        G = _.less(D, width * width).reshape(shape)
-        # FIXME (why is this needed ...)
-        return G.swapaxes(0, 1)
+        return R, _.less(D, width * width).reshape(R.shape)
+
+    def compute(self, shape: int3, matrix: glm.mat4, width: float):
+        """ Voxel grid of {shape} """
+        R, G = self.crop(shape, matrix, width)
+        F = Box.OffsetShape((0, 0, 0), shape)
+        out = np.zeros(shape, np.bool_)
+        out[F.slice(R)] = G
+        return out
+
+    def voxelize(self, material: Material, shape: int3, matrix: glm.mat4, width: float, layout: Layout = Layout()) -> Data:
+        """ Cropped voxel data (positioned inside {shape}) """
+        R, G = self.crop(shape, matrix, width)
+        return Data.FromMaterialGrid(material, G, layout).offset(R.start)
+
+    def take(self, index: slice) -> 'Field':
+        """ Part of a batched field (points as (3, K)) """
+        F = copy(self)
+        for k, v in vars(self).items():
+            if isinstance(v, np.ndarray) and v.ndim == 2:
+                setattr(F, k, v[:, index])
+        return F
+
+    def crop_all(self, shape: int3, matrix: glm.mat4, width: float, tile: int = 1 << 20, slack: float = 1.25) -> list[tuple[Box, Array[B]]]:
+        """ Voxel grids of a batched field, one per volume (see crop)
+
+        Volumes of similar region shapes are evaluated together (padded
+        to a common shape, at most {slack} x the voxels they need and
+        about {tile} voxels per pass).
+        """
+        low, high = (a.T for a in self.regions(shape, matrix, width))
+        size = high - low
+        inverse = glm.affineInverse(matrix)
+        T = mat.to_affine(inverse).astype(np.float32)
+
+        out: list[tuple[Box, Array[B]]] = [None] * low.shape[0]  # type: ignore
+        for J, S in _groups(size, tile, slack):
+            if not S.all():
+                for k in J:
+                    out[k] = (Box(low[k], high[k]), np.zeros(tuple(size[k]), np.bool_))
+                continue
+            # Common lattice & an offset per volume
+            base = _.lattice(Box(np.zeros(3, np.int64), S), inverse).reshape(3, 1, -1)
+            offset = T[:, :3] @ low[J].T.astype(np.float32)
+            # Get distance fields (K, N)
+            D = self.take(J).field(base + offset[..., _.ex])
+            G = _.less(D, width * width).reshape(-1, *S)
+            for k, g in zip(J, G):
+                X, Y, Z = size[k]
+                out[k] = (Box(low[k], high[k]), g[:X, :Y, :Z])
+        return out
+
+    def voxelize_all(self, material: Material, shape: int3, matrix: glm.mat4, width: float, layout: Layout = Layout()) -> list[Data]:
+        """ Cropped voxel data of a batched field, one per volume """
+        return [
+            Data.FromMaterialGrid(material, G, layout).offset(R.start)
+            for R, G in self.crop_all(shape, matrix, width)
+        ]
 
 
 class Sphere(Field):
@@ -87,7 +213,10 @@ class Sphere(Field):
     def field(self, P: Array[F]) -> Array[F]:
         assert _.is_points(P), "{P} is not array of points"
         # Compute distance field
-        return _.sqr_norm(P - self.center[:, _.ex])
+        return _.sqr_norm(P - self.center[..., _.ex])
+
+    def bounds(self, width: float):
+        return self.center - width, self.center + width
 
 
 class Cylinder(Field):
@@ -98,17 +227,24 @@ class Cylinder(Field):
     def field(self, P: Array[F]) -> Array[F]:
         assert _.is_points(P), "{P} is not array of points"
         # Relative vectors
-        pa = P - self.a[:, _.ex]
+        pa = P - self.a[..., _.ex]
         ba = self.b - self.a
         # Projection
-        proj = _.row_dot(pa, ba) / np.dot(ba, ba)
+        proj = _.row_dot(pa, ba) / _.sqr_len(ba)
         # Compute distance field
-        D = _.sqr_norm(pa - ba[:, _.ex] * proj[_.ex, :])
+        D = _.sqr_norm(pa - ba[..., _.ex] * proj[_.ex])
         # Cut ends
         D[(0.0 > proj) | (proj > 1.0)] = np.inf
         # done
         return D
 
+    def bounds(self, width: float):
+        # Disc radius along each axis
+        ba = self.b - self.a
+        d = ba * ba / np.sum(ba * ba, axis=0)
+        e = width * np.sqrt(np.maximum(1.0 - d, 0.0))
+        return np.minimum(self.a, self.b) - e, np.maximum(self.a, self.b) + e
+
 
 class Capsule(Field):
     def __init__(self, a: _.V, b: _.V):
@@ -118,14 +254,17 @@ class Capsule(Field):
     def field(self, P: Array[F]) -> Array[F]:
         assert _.is_points(P), "{P} is not array of points"
         # Relative vectors
-        pa = P - self.a[:, _.ex]
+        pa = P - self.a[..., _.ex]
         ba = self.b - self.a
         # Projection
-        proj = _.row_dot(pa, ba) / np.dot(ba, ba)
+        proj = _.row_dot(pa, ba) / _.sqr_len(ba)
         # Clamp to ends
         ends = np.clip(proj, 0.0, 1.0)  # type: ignore
         # Compute distance field
-        return _.sqr_norm(pa - ba[:, _.ex] * ends[_.ex, :])
+        return _.sqr_norm(pa - ba[..., _.ex] * ends[_.ex])
+
+    def bounds(self, width: float):
+        return np.minimum(self.a, self.b) - width, np.maximum(self.a, self.b) + width
 
 
 if __name__ == '__main__':
@@ -134,7 +273,6 @@ if __name__ == '__main__':
         N = f.__class__.__name__
         print(N, G.mean())
 
-
     test(Sphere(_.point(5, 5, 5)))
     test(Cylinder(_.point(3, 3, 3), _.point(7, 7, 7)))
     test(Capsule(_.point(3, 3, 3), _.point(7, 7, 7)))
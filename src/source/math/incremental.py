@@ -0,0 +1,329 @@
+"""
+Incremental stiffness assembly for a fixed base structure
+
+The base voxels are turned into a truss & stiffness triplets once,
+a variant (ie. base + rod) is compared to the base voxel by voxel:
+
+- unchanged voxels reuse the base nodes, edges & triplets
+- edges touching changed voxels are removed (base) & rebuilt (variant)
+- the stiffness matrix is the (summed & sorted) base entries + the edge
+  delta merged in, scattered into the fixed pattern of the node space
+
+The kernel work scales w/ the changed voxels instead of the structure,
+the merge & reduction are linear passes (no sorting per variant).
+"""
+from dataclasses import replace
+
+from scipy.sparse import csr_matrix as sparse
+import numpy as np
+
+from ..data.truss import Truss
+from ..data.voxels import Voxels
+from ..data.voxel_tree.box import Box
+from .truss2stress import edge_kernels, edge_triplets
+from .voxels2truss import voxels2truss
+
+__all__ = ['Incremental', 'lattice_key']
+
+
+def lattice_key(coords: 'np.ndarray') -> 'np.ndarray':
+    """ Pack signed voxel coordinates (x, y, z) into one sortable int64 """
+    C = coords.astype(np.int64) + (1 << 20)
+    return (C[:, 0] << 42) | (C[:, 1] << 21) | C[:, 2]
+
+
+def _key(I: 'np.ndarray', J: 'np.ndarray') -> 'np.ndarray':
+    # Sortable (row, column) key
+    return (I.astype(np.int64) << 32) | J.astype(np.int64)
+
+
+def _embed(array: 'np.ndarray', offset: 'np.ndarray', low: 'np.ndarray', shape: 'np.ndarray'):
+    """ Place a grid (at offset) inside a zero grid (at low) """
+    out = np.zeros(tuple(shape), array.dtype)
+    start = offset - low
+    out[tuple(slice(a, a + s) for a, s in zip(start, array.shape))] = array
+    return out
+
+
+def _blocks(A: 'np.ndarray', B: 'np.ndarray', DOF: int) -> 'np.ndarray':
+    """ (row, column) keys of the full (DOF x DOF) blocks between nodes """
+    axis = np.arange(DOF, dtype=np.int64)
+    I = A.astype(np.int64)[:, None] * DOF + np.repeat(axis, DOF)
+    J = B.astype(np.int64)[:, None] * DOF + np.tile(axis, DOF)
+    return _key(I.ravel(), J.ravel())
+
+
+def _layout(pattern: 'np.ndarray', size: int):
+    """ CSR structure of sorted keys: (keys, columns, row pointers, diagonal) """
+    rows = pattern >> 32
+    columns = pattern & 0xFFFFFFFF
+    indptr = np.zeros(size + 1, np.int64)
+    np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+    diagonal = np.searchsorted(pattern, _key(np.arange(size), np.arange(size)))
+    return pattern, columns, indptr, diagonal
+
+
+def _system(layout, size: int, keys: 'np.ndarray', values: 'np.ndarray', locked: 'np.ndarray') -> sparse:
+    """ Scatter entries into a layout, locked axes become identity rows """
+    pattern, columns, indptr, diagonal = layout
+    data = np.zeros(pattern.size, np.float64)
+    data[np.searchsorted(pattern, keys)] = values
+    data[locked[pattern >> 32] | locked[columns]] = 0.0
+    data[diagonal[locked]] = 1.0
+    K = sparse((data, columns, indptr), shape=(size, size))
+    K.has_sorted_indices = True
+    return K
+
+
+class Incremental:
+    """ Base structure assembled once, variants as sparse updates
+
+    The system spans a fixed node space: the base nodes & every voxel
+    of the {region} (ie. where rods may appear). Nodes a variant leaves
+    empty & static axes are kept as identity rows, so variants inside
+    the region share one sparsity pattern (one solver analysis).
+
+    A mostly empty region (ie. a hollow base) is dropped when its filled
+    pattern exceeds {fill} x the base entries: factorizing that fill-in
+    costs more than a new analysis per variant.
+    """
+
+    def __init__(self, base: Voxels, elasticity: float = 1E9, limit: float = 0.25, region: Box | None = None, fill: float = 1.25):
+        self.base = base
+        self.elasticity = elasticity
+        # Fraction of changed nodes before rebuilding is cheaper
+        self.limit = limit
+        # Pattern growth (vs. the base) a region may cost
+        self.fill = fill
+
+        # Base truss & global voxel coordinates of its nodes
+        self.truss = voxels2truss(base)
+        self.offset = np.asarray(base.offset, np.int64)
+        self.coords = np.floor(self.truss.nodes).astype(np.int64) + self.offset
+
+        # Node lookup by coordinate (nonzero order is sorted)
+        self.keys = lattice_key(self.coords)
+
+        # Base stiffness entries (every axis) by sorted (row, column) key
+        self.kernels = edge_kernels(self.truss, elasticity)
+        I, J, V = edge_triplets(*self.kernels)
+        size = self.truss.nodes.size
+        K = sparse((V, (I, J)), shape=(size, size))
+        K.sum_duplicates()
+        rows = np.repeat(np.arange(size, dtype=np.int64), np.diff(K.indptr))
+        self.entries = _key(rows, K.indices)
+        self.values = K.data
+
+        # Node space & every entry a variant inside it can have
+        self.stable = self._space(region)
+        if not self.stable:
+            # The filled region costs more fill-in than reuse saves
+            self._space(None)
+
+    def _space(self, region: Box | None) -> bool:
+        """ Span the base & region nodes (False if the pattern would outgrow {fill}) """
+        # Frame of the base & the region
+        self.low = self.offset
+        self.high = self.offset + self.base.grid.shape
+        if region is None or region.is_empty:
+            region = Box(self.low, self.low)
+        else:
+            self.low = np.minimum(self.low, region.start)
+            self.high = np.maximum(self.high, region.stop)
+
+        # Region voxels outside the base (C order is sorted)
+        self.extra_keys = np.zeros(0, np.int64)
+        R = np.indices(region.shape).reshape(3, -1).T + region.start
+        self.extra = R[self._lookup(lattice_key(R)) == -1]
+        self.extra_keys = lattice_key(self.extra)
+
+        DOF = self.truss.nodes.shape[1]
+        pattern = self._pattern(DOF)
+        self.pattern = _layout(pattern, (self.keys.size + self.extra_keys.size) * DOF)
+        return pattern.size <= self.fill * max(self.entries.size, 1)
+
+    def _lookup(self, K: 'np.ndarray', AK: 'np.ndarray' = np.zeros(0, np.int64)) -> 'np.ndarray':
+        """ Node ids by lattice key: base, region, then added nodes (-1 if unknown) """
+        ID = np.full(K.size, -1, np.int64)
+        start = 0
+        for S in (self.keys, self.extra_keys, AK):
+            if S.size:
+                P = np.minimum(np.searchsorted(S, K), S.size - 1)
+                hit = S[P] == K
+                ID[hit] = P[hit] + start
+            start += S.size
+        return ID
+
+    def _pattern(self, DOF: int) -> 'np.ndarray':
+        """ Structural (row, column) keys of the node space, fully filled
+
+        Same structure as edge_triplets: axis aligned edges only
+        couple their own axes.
+        """
+        C = np.vstack([self.coords, self.extra])
+        if not C.size:
+            return np.zeros(0, np.int64)
+        low = C.min(axis=0)
+        full = Voxels(tuple(C.max(axis=0) - low + 1))
+        full.grid[tuple((C - low).T)] = 1
+        full.strength[tuple((C - low).T)] = 1.0
+        T = voxels2truss(full)
+
+        # Lattice edges in node space ids
+        ID = self._lookup(lattice_key(np.floor(T.nodes).astype(np.int64) + low))
+        E0, E1, D, O = edge_kernels(T, 1.0)
+        I, J, _ = edge_triplets(ID[E0], ID[E1], D, O)
+
+        # (Isolated nodes keep their diagonal block)
+        N = np.arange(C.shape[0], dtype=np.int64)
+        return np.unique(np.concatenate([_key(I, J), _blocks(N, N, DOF)]))
+
+    def update(self, voxels: Voxels) -> 'tuple[Truss, sparse] | None':
+        """ Truss & stiffness matrix of a variant (None -> rebuild)
+
+        The matrix spans every axis of the truss nodes,
+        static axes & empty nodes are identity rows.
+        """
+        B = self.base
+        T = self.truss
+        L, DOF = T.nodes.shape
+        X = self.extra.shape[0]
+        offset = np.asarray(voxels.offset, np.int64)
+
+        # Common frame of the base, the region & the variant
+        low = np.minimum(self.low, offset)
+        high = np.maximum(self.high, offset + voxels.grid.shape)
+        shape = high - low
+
+        GB = _embed(B.grid, self.offset, low, shape)
+        GV = _embed(voxels.grid, offset, low, shape)
+        SB = _embed(B.strength, self.offset, low, shape)
+        SV = _embed(voxels.strength, offset, low, shape)
+
+        # Changed voxels
+        changed = (GB != GV) | (SB != SV)
+        C = np.vstack(np.nonzero(changed)).T
+        if C.shape[0] > self.limit * L:
+            return None
+
+        # Base nodes (touched by a change / still present)
+        local = tuple((self.coords - low).T)
+        touched = changed[local]
+        kept = GV[local] > 0
+
+        # Region nodes (present where filled)
+        region = tuple((self.extra - low).T)
+        filled = GV[region] > 0
+
+        # Added nodes outside the region (nonzero order is sorted by key)
+        AC = np.vstack(np.nonzero(changed & (GB == 0) & (GV > 0))).T + low
+        AC = AC[self._lookup(lattice_key(AC)) == -1]
+        AK = lattice_key(AC)
+        A = AC.shape[0]
+
+        # Base edges touching a changed voxel are stale
+        E0, E1, D, O = self.kernels
+        stale = touched[E0] | touched[E1]
+
+        # Rebuilt edges touching a changed voxel
+        FE, FA, (FI, FJ, FV) = self._rebuild(C, changed, GV, SV, low, AK)
+
+        # Stiffness delta: rebuilt - stale
+        XI, XJ, XV = edge_triplets(E0[stale], E1[stale], D[stale], O[stale])
+        keys, V = self._merge(
+            _key(np.concatenate([XI, FI]), np.concatenate([XJ, FJ])),
+            np.concatenate([-XV, FV]),
+        )
+
+        # Variant node attributes (base, region, then added)
+        M = np.concatenate([GV[local], GV[region], GV[tuple((AC - low).T)]])
+        update = np.concatenate([touched & kept, filled, np.ones(A, np.bool_)])
+        present = np.concatenate([kept, filled, np.ones(A, np.bool_)])
+        nodes = np.vstack([self.coords, self.extra, AC]) - offset
+
+        N = L + X + A
+        static = np.vstack([T.static, np.zeros((N - L, DOF), np.bool_)])
+        forces = np.vstack([T.forces, np.zeros((N - L, DOF), np.float64)])
+        loads = T.loads if T.loads is not None else np.zeros((0, L, DOF))
+        loads = np.concatenate([loads, np.zeros((loads.shape[0], N - L, DOF))], axis=1)
+        if update.any():
+            U = M[update]
+            static[update] = voxels.static_map()[U, :]
+            forces[update] = voxels.force_map()[U, :]
+            loads[:, update] = voxels.load_maps()[:, U, :]
+
+        # Empty nodes are locked
+        static[~present] = True
+        forces[~present] = 0.0
+        loads[:, ~present] = 0.0
+
+        # Entries in the fixed pattern (added nodes extend it)
+        size = N * DOF
+        if A:
+            AN = np.arange(L + X, N, dtype=np.int64)
+            pattern = self.pattern[0]
+            layout = _layout(np.union1d(pattern, np.concatenate([keys, _blocks(AN, AN, DOF)])), size)
+        else:
+            layout = self.pattern
+        K = _system(layout, size, keys, V, static.ravel())
+
+        edges = np.vstack([T.edges[~stale], FE]).astype(np.int64)
+        truss = Truss(
+            nodes=(nodes + 0.5).astype(np.float32),
+            forces=forces,
+            static=static,
+            edges=edges.astype(np.uint32),
+            areas=np.concatenate([T.areas[~stale], FA]),
+            loads=loads,
+        )
+        return truss, K
+
+    def _merge(self, keys: 'np.ndarray', values: 'np.ndarray'):
+        """ Base entries w/ a delta added (sorted keys & values) """
+        # Sum the delta per entry
+        keys, inverse = np.unique(keys, return_inverse=True)
+        values = np.bincount(inverse, values, minlength=keys.size)
+
+        # Update existing entries
+        K = self.entries
+        P = np.searchsorted(K, keys)
+        hit = K[np.minimum(P, K.size - 1)] == keys
+        V = self.values.copy()
+        V[P[hit]] += values[hit]
+        if hit.all():
+            return K, V
+
+        # Insert new entries (ie. added nodes) in order
+        new = ~hit
+        return np.insert(K, P[new], keys[new]), np.insert(V, P[new], values[new])
+
+    def _rebuild(self, C: 'np.ndarray', changed: 'np.ndarray', GV: 'np.ndarray', SV: 'np.ndarray', low: 'np.ndarray', AK: 'np.ndarray'):
+        """ Edges touching changed voxels (in variant node ids), areas & triplets """
+        none = (np.zeros((0, 2), np.int64), np.zeros(0), (np.zeros(0, np.int64),) * 2 + (np.zeros(0),))
+        if not C.size:
+            return none
+
+        # Region around the changes (padded by one)
+        start = np.maximum(C.min(axis=0) - 1, 0)
+        stop = np.minimum(C.max(axis=0) + 2, changed.shape)
+        R = tuple(slice(a, b) for a, b in zip(start, stop))
+        region = Voxels(GV[R].shape)
+        region.grid = GV[R]
+        region.strength = SV[R]
+        if not region.grid.any():
+            return none
+        T = voxels2truss(region)
+
+        # Region nodes -> variant nodes (base first, then added)
+        RC = np.floor(T.nodes).astype(np.int64) + start
+        ID = self._lookup(lattice_key(RC + low), AK)
+
+        # Keep edges touching a change
+        near = changed[tuple(RC.T)]
+        S = near[T.edges[:, 0]] | near[T.edges[:, 1]]
+        T = replace(T, edges=T.edges[S], areas=T.areas[S])
+
+        E0, E1, D, O = edge_kernels(T, self.elasticity)
+        E0 = ID[E0]
+        E1 = ID[E1]
+        return np.vstack([E0, E1]).T, T.areas, edge_triplets(E0, E1, D, O)
@@ -1,9 +1,15 @@
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Callable
 import glm
 import source.graphics.matrices as mat
 import numpy as np
 from source.data.mesh import Geometry, Mesh
-from .rasterizers.np_raster import Z_Hash_Rasterizer
+from .rasterizers.np_raster import Vector_Rasterizer
 from .rasterizers.RasterDirection import Raster_Direction_3D
+from .rasterizers.hits import HitBuffer, resolve, segments, fill
+from .winding import Winding
 
 from source.utils.types import int3, Array, F, I, B
 from source.debug.time import time
@@ -18,21 +24,45 @@ Resources:
 
 """
 
+# Version of the rasterized output (bump when the voxels of a mesh change)
+VERSION = 2
+
+# Triangles per tile (screen space band of x), before splitting up
+TILE = 1 << 16
+
+# Winding number tests per thread, before splitting up
+POINTS = 1 << 12
+
+
 @time("mesh_to_voxels")
-def mesh_to_voxels(mesh: Mesh, matrix: glm.mat4, shape: int3):
+def mesh_to_voxels(mesh: Mesh, matrix: glm.mat4, shape: int3, single: bool = False, workers: int = 0):
+    """ Voxel grid of a (closed) mesh
+
+    Directions & tiles are rasterized on {workers} threads
+    (0 -> all cores), the numpy kernels release the GIL.
+    """
     # Transform mesh into shape
     V, I = _transform(mesh, matrix)
-    # Setup output array
-    O = np.zeros(shape, dtype=np.uint8)
-    # Compute for X, Y, Z
-    O[_rasterize(V, I, shape, 'Z')] += 1
-    O[_rasterize(V, I, shape, 'X')] += 1
-    O[_rasterize(V, I, shape, 'Y')] += 1
-    # Infer results 
+    workers = workers or os.cpu_count() or 1
+    if single:
+        return _single(V, I, shape, workers)
+    # Compute for X, Y, Z concurrently (counted in place)
+    with _pool(workers, 3 * max(len(I) // TILE, 1)) as pool:
+        Z, X, Y = (_submit(V, I, shape, d, pool, workers) for d in 'ZXY')
+        O = Z().astype(np.uint8)
+        O += X()
+        O += Y()
+    # Infer results
     # (0|1 -> empty)
-    # (2|3 -> voxel) 
+    # (2|3 -> voxel)
     return O > 1
- 
+
+
+def _pool(workers: int, tasks: int):
+    """ Threads for {tasks} (nothing to parallelize -> no pool) """
+    count = min(workers, tasks)
+    return ThreadPoolExecutor(count) if count > 1 else nullcontext()
+
 
 def _transform(mesh: Mesh, matrix: glm.mat4):
     assert mesh.geometry == Geometry.Triangles, \
@@ -50,20 +80,122 @@ def _transform(mesh: Mesh, matrix: glm.mat4):
     return vertices, indices
 
 
-def _rasterize(vertices: 'Array[F]', indices: 'Array[I]', voxels: int3, direction: str) -> 'Array[B]':
-    D = Raster_Direction_3D[direction]
+def _axis(vertices: 'Array[F]', indices: 'Array[I]') -> str:
+    """ Direction w/ the smallest projected area (fewest hits) """
+    T = vertices[indices]
+    N = np.cross(T[:, 1] - T[:, 0], T[:, 2] - T[:, 0])
+    return 'XYZ'[int(np.argmin(np.abs(N).sum(axis=0)))]
+
+
+def _tiles(vertices: 'Array[F]', indices: 'Array[I]', x: int, workers: int):
+    """ Tiles of the screen [lx, hx) (about one per {TILE} triangles)
+    w/ the triangles overlapping them
+    """
+    k = min(max(len(indices) // TILE, 1), workers, max(x, 1))
+    if k == 1:
+        return [((0, x), indices)]
+    # Pixels w/ a center inside the bounds (see Vector_Rasterizer)
+    X = vertices[indices, 0]
+    lx = np.ceil(X.min(axis=1) - 0.5)
+    hx = np.floor(X.max(axis=1) - 0.5) + 1
+    E = np.linspace(0, x, k + 1).astype(np.int64)
+    return [
+        ((int(l), int(h)), indices[(lx < h) & (hx > l)])
+        for l, h in zip(E[:-1], E[1:])
+    ]
+
+
+def _single(vertices: 'Array[F]', indices: 'Array[I]', voxels: int3, workers: int = 1) -> 'Array[B]':
+    """ Rasterize along one axis, repair columns w/ odd parity
+
+    Columns w/ an odd count of hits (holes, cuts, overlaps)
+    are filled by the winding number of the mesh instead,
+    tested at the ends of every span between hits (spans
+    crossing a hole are bisected to where it flips).
+    """
+    D = Raster_Direction_3D[_axis(vertices, indices)]
+    S = D.reshape(voxels)
+    V = vertices[:, D.swizzle]
+
+    # Tiles of the screen, hit buffers merged
+    def tile(band: tuple[int, int], tris: 'Array[I]'):
+        rasterizer = Vector_Rasterizer(S, band)
+        rasterizer.run(tris, V)
+        return rasterizer.hits.arrays()
+
+    hits = HitBuffer()
+    tiles = _tiles(V, indices, S[0], workers)
+    with _pool(workers, len(tiles)) as pool:
+        for P, Z in (pool.map if pool else map)(tile, *zip(*tiles)):
+            hits.extend(P, Z)
+    pixels, depths = hits.arrays()
+
+    # Consistent columns by parity
+    grid = resolve(pixels, depths, S, minimum=2, even=True)
+
+    # Inconsistent columns by winding number
+    P, span0, span1 = segments(pixels, depths, S[2])
+    if not P.size:
+        return D.transpose(grid)
+    x, y = P // S[1] + 0.5, P % S[1] + 0.5
+    inside = Winding(V[indices]).inside
+
+    # Winding numbers of about {POINTS} points per thread
+    with _pool(workers, -(-2 * P.size // POINTS)) as pool:
+        # Spans w/ the same side at both ends are filled as one
+        low = inside(np.stack([x, y, span0 + 0.5], axis=1), pool=pool)
+        high = inside(np.stack([x, y, span1 - 0.5], axis=1), pool=pool)
+        same = low == high
+        M = same & low
+        fill(grid.reshape(-1, S[2]), P[M], span0[M], span1[M])
+
+        # A hole inside the span, bisect to the voxel where it flips
+        H = ~same
+        x, y, side = x[H], y[H], low[H]
+        lo, hi = span0[H], span1[H] - 1
+        while True:
+            J = np.flatnonzero(hi - lo > 1)
+            if not J.size:
+                break
+            mid = (lo[J] + hi[J]) // 2
+            flip = inside(np.stack([x[J], y[J], mid + 0.5], axis=1), pool=pool) != side[J]
+            hi[J] = np.where(flip, mid, hi[J])
+            lo[J] = np.where(flip, lo[J], mid)
+        fill(grid.reshape(-1, S[2]), P[H], np.where(side, span0[H], hi), np.where(side, hi, span1[H]))
 
-    # Init rasterizer
-    # Tested to be the 'fastest' of the python-rasterizers
-    # TODO: write a native rasterizer w/ python bindings
-    rasterizer = Z_Hash_Rasterizer(D.reshape(voxels)) 
+    # Restore grid from swizzling
+    return D.transpose(grid)
 
-    # Potential Parallel-For
-    # Swizzle coordinates
-    rasterizer.run(indices, vertices[:, D.swizzle])
 
-    # Potential Parallel-For
-    grid = rasterizer.voxels()
+def _submit(vertices: 'Array[F]', indices: 'Array[I]', voxels: int3, direction: str, pool: Executor | None = None, workers: int = 1) -> 'Callable[[], Array[B]]':
+    """ Rasterize a direction (tiles on {pool}), get an awaiter back """
+    D = Raster_Direction_3D[direction]
+    S = D.reshape(voxels)
+    grid = np.zeros(S, np.bool_)
 
-    # Restore grid from swizzling
-    return D.transpose(grid)
+    # Swizzle coordinates
+    V = vertices[:, D.swizzle]
+
+    # Parallel-For over tiles (disjoint columns of the grid)
+    def tile(band: tuple[int, int], tris: 'Array[I]'):
+        # Init rasterizer (vectorized, batches of triangles)
+        rasterizer = Vector_Rasterizer(S, band)
+        rasterizer.run(tris, V)
+        grid[band[0]:band[1]] = rasterizer.voxels()
+
+    tiles = _tiles(V, indices, S[0], workers)
+    if pool is None:
+        for T in tiles:
+            tile(*T)
+        tasks = []
+    else:
+        tasks = [pool.submit(tile, *T) for T in tiles]
+
+    # return awaiter
+    def wait():
+        for T in tasks:
+            T.result()
+        # Restore grid from swizzling
+        return D.transpose(grid)
+
+    return wait
@@ -0,0 +1,179 @@
+"""
+Geometric multigrid for the voxel truss stiffness system
+
+The truss nodes of TrussBuilder sit on a regular voxel lattice,
+coarse levels are built by agglomerating 2x2x2 voxels into one.
+
+- prolongation : (bi/tri)linear interpolation between lattice levels
+                 (renormalized where coarse nodes are missing)
+- restriction  : transpose of the prolongation
+- coarse matrix: Galerkin product (R @ A @ P)
+- smoother     : damped Jacobi
+"""
+from itertools import product
+
+from scipy.sparse import csr_matrix as sparse
+from scipy.sparse.linalg import LinearOperator, splu
+import numpy as np
+
+from ..utils.types import Array, F, I, B
+
+__all__ = ['Multigrid', 'prolongation']
+
+# Interpolation weights towards (own, neighbour) coarse node
+WEIGHTS = (0.75, 0.25)
+
+
+def _ravel(coords: 'Array[I]', low: 'Array[I]', dims: 'Array[I]') -> 'Array[I]':
+    return np.ravel_multi_index(tuple((coords - low).T), tuple(dims))
+
+
+def prolongation(coords: 'Array[I]', free: 'Array[B]'):
+    """ Interpolation from the 2x coarser lattice onto the free axes
+
+    Args:
+        ::coords => [L, DIM] lattice coordinate per node
+        ::free => [L, DOF] free (non static) axes per node
+
+    Returns:
+        ::P => [free DOF, coarse DOF] prolongation
+        ::coarse => [Lc, DIM] coarse lattice coordinates
+        ::cfree => [Lc, DOF] coarse axes that are in use
+    """
+    L, DOF = free.shape
+    DIM = coords.shape[1]
+
+    # Coarse nodes (agglomerates)
+    own = coords // 2
+    coarse = np.unique(own, axis=0)
+
+    # Lookup of coarse nodes (padded by one to fit neighbours)
+    low = coarse.min(axis=0) - 1
+    dims = coarse.max(axis=0) - low + 2
+    keys = _ravel(coarse, low, dims)
+
+    # Neighbour direction per axis (odd -> +1, even -> -1)
+    step = np.where(coords % 2 == 1, 1, -1)
+
+    rows = []
+    cols = []
+    vals = []
+    for corner in product((0, 1), repeat=DIM):
+        C = np.array(corner)
+        # Coarse node & weight for this corner
+        target = own + step * C
+        weight = np.prod(np.where(C == 1, WEIGHTS[1], WEIGHTS[0]))
+        # Drop missing coarse nodes
+        K = _ravel(target, low, dims)
+        P = np.searchsorted(keys, K)
+        np.minimum(P, keys.size - 1, out=P)
+        hit = keys[P] == K
+        rows.append(np.nonzero(hit)[0])
+        cols.append(P[hit])
+        vals.append(np.full(hit.sum(), weight))
+
+    R = np.concatenate(rows)
+    C = np.concatenate(cols)
+    V = np.concatenate(vals)
+
+    # Renormalize (missing neighbours)
+    V /= np.bincount(R, V, minlength=L)[R]
+
+    # Fine DOF indices (-1 for static axes)
+    ID = np.full((L, DOF), -1, np.int64)
+    ID[free] = np.arange(int(free.sum()))
+
+    # Expand node weights to every axis
+    FR = ID[R, :].ravel()
+    FC = (C[:, None] * DOF + np.arange(DOF)).ravel()
+    FV = np.repeat(V, DOF)
+
+    # Remove static rows
+    KEEP = FR != -1
+    FR, FC, FV = FR[KEEP], FC[KEEP], FV[KEEP]
+
+    # Remove unused coarse axes
+    cfree = np.zeros(coarse.shape[0] * DOF, np.bool_)
+    cfree[FC] = True
+    CID = np.cumsum(cfree) - 1
+
+    P = sparse((FV, (FR, CID[FC])), shape=(int(free.sum()), int(cfree.sum())))
+    return P, coarse, cfree.reshape(-1, DOF)
+
+
+class Multigrid:
+    """ Multigrid hierarchy for a lattice truss system """
+
+    def __init__(
+        self,
+        A: sparse,
+        coords: 'Array[I]',
+        free: 'Array[B]',
+        coarsest: int = 2000,
+        depth: int = 12,
+        smooth: int = 2,
+        omega: float = 2 / 3,
+    ):
+        self.smooth = smooth
+        self.omega = omega
+        self.levels: list[tuple[sparse, 'Array[F]', sparse]] = []
+
+        A = sparse(A)
+        while A.shape[0] > coarsest and len(self.levels) < depth:
+            P, coords, free = prolongation(coords, free)
+            # Stop when the lattice no longer coarsens
+            if P.shape[1] >= P.shape[0]:
+                break
+            self.levels.append((A, np.reciprocal(A.diagonal()), P))
+            A = sparse(P.T @ A @ P)
+
+        # Direct solve on the coarsest level
+        self.coarse = splu(A.tocsc())
+
+    @property
+    def shape(self):
+        if self.levels:
+            return self.levels[0][0].shape
+        n = self.coarse.shape[0]
+        return n, n
+
+    def cycle(self, b: 'Array[F]', level: int = 0) -> 'Array[F]':
+        """ One V-cycle from a zero initial guess """
+        if level == len(self.levels):
+            return self.coarse.solve(b)
+
+        A, D, P = self.levels[level]
+        x = np.zeros_like(b)
+
+        # Pre smoothing
+        for _ in range(self.smooth):
+            x += self.omega * D * (b - A @ x)
+
+        # Coarse correction
+        x += P @ self.cycle(P.T @ (b - A @ x), level + 1)
+
+        # Post smoothing
+        for _ in range(self.smooth):
+            x += self.omega * D * (b - A @ x)
+
+        return x
+
+    def preconditioner(self) -> LinearOperator:
+        """ V-cycle as a (symmetric) preconditioner """
+        return LinearOperator(
+            self.shape,
+            lambda x: self.cycle(np.ravel(x).astype(np.float64)),
+            dtype=np.float64,
+        )
+
+    def solve(self, A: sparse, b: 'Array[F]', x0: 'Array[F] | None' = None, rtol: float = 1E-8, maxiter: int = 200):
+        """ Stationary V-cycle iteration """
+        x = np.zeros_like(b) if x0 is None else x0.copy()
+        norm = np.linalg.norm(b) or 1.0
+        for _ in range(maxiter):
+            r = b - A @ x
+            if np.linalg.norm(r) <= rtol * norm:
+                return x
+            x += self.cycle(r)
+        print(f"[multigrid] no convergence after {maxiter} cycles")
+        return x
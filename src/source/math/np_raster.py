@@ -1,35 +1,24 @@
-from collections import defaultdict
-
 from source.debug.time import time
 from ..utils.types import int3, Array, F, I
 from .linalg import unpack
+from .rasterizers.hits import HitBuffer
 import numpy as np
 import glm
 
-EMPTY = np.zeros(0, np.float32)
-
 
 class Z_Hash_Rasterizer:
 
     def __init__(self, shape: int3):
         self.shape = x, y, z = shape
-        self.stride = x
+        self.stride = y
         self.height = z
-        self.zhash: dict[int, 'Array[F]'] = \
-            defaultdict(lambda: EMPTY)
+        self.hits = HitBuffer()
         self.xy_min = np.zeros(2, np.int32)
         self.xy_max = np.zeros(2, np.int32)
         self.xy_max[:] = x, y
 
     def plot(self, x: int, y: int, z: float):
-        I = x + y * self.stride
-        self.zhash[I] = np.append(self.zhash[I], z)  # type: ignore
-
-    def get(self, I: int):
-        x = I % self.stride
-        y = I // self.stride
-        z = np.unique(self.zhash[I])
-        return x, y, z
+        self.hits.add(x * self.stride + y, z)
 
     def rasterize(self, X: 'Array[F]', Y: 'Array[F]', Z: 'Array[F]'):
         x, y, _ = self.shape
@@ -90,26 +79,7 @@ class Z_Hash_Rasterizer:
             self.rasterize(X, Y, Z)
 
     def voxels(self):
-        # Voxel Grid to fill / return
-        grid = np.zeros(self.shape, np.bool_)
-
-        # Z-indexes for Z-axis
-        s = np.arange(self.height, dtype=np.float32) + 0.5
-
-        for i in self.zhash:
-            x, y, z = self.get(i)
-            if z.size == 1:
-                print("cut")
-                continue
-            # Find the boolean matrix for voxel-surface-ray-intersection
-            B = s[:, np.newaxis] <= z[np.newaxis, :]
-            # Count ray-intersections
-            C: 'Array[I]' = \
-                np.count_nonzero(B, axis=1)  # type: ignore
-            # intersection modulo 2 means that the voxel is inside the mesh
-            grid[x, y, :] = C % 2
-
-        return grid
+        return self.hits.voxels(self.shape)
 
 def minmax(V: 'Array[F]', h: int):
     lv = max(round(V.min()), 0)
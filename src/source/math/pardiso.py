@@ -0,0 +1,165 @@
+from scipy.sparse import csr_matrix as sparse
+from pypardiso import PyPardisoSolver
+import pypardiso
+import numpy as np
+
+from ..utils.types import Array, F, I
+
+__all__ = ['Session']
+
+# [paradiso] phases
+ANALYSIS = 11
+NUMERIC = 22
+SOLVE = 33
+
+# Private [pypardiso] methods the session drives directly
+# NOTE: tested with pypardiso 0.4.7 (pinned in pyproject.toml)
+INTERNALS = ('_call_pardiso', '_check_A', '_check_b')
+
+
+def pattern_keys(A: sparse) -> 'Array[I]':
+    """ Linear (row, column) keys of the stored entries (sorted for CSR) """
+    n = A.shape[0]
+    rows = np.repeat(np.arange(n, dtype=np.int64), np.diff(A.indptr))
+    return rows * n + A.indices
+
+
+def pattern_matrix(keys: 'Array[I]', n: int) -> sparse:
+    """ Rebuild an (all zero) CSR matrix from sorted linear keys """
+    rows = keys // n
+    indptr = np.zeros(n + 1, np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    data = np.zeros(keys.size, np.float64)
+    M = sparse((data, keys % n, indptr), shape=(n, n))
+    M.has_sorted_indices = True
+    return M
+
+
+class Internals:
+    """ The private [pypardiso] methods used to run single phases
+
+    Without them (ie. another pypardiso version) {available} is
+    false and calling any of them raises a clear error.
+    """
+
+    def __init__(self, solver: PyPardisoSolver):
+        self.solver = solver
+        self.missing = [name for name in INTERNALS if not hasattr(solver, name)]
+
+    @property
+    def available(self) -> bool:
+        return not self.missing
+
+    def _get(self, name: str):
+        if name in self.missing:
+            raise RuntimeError(
+                f"[pardiso] pypardiso {getattr(pypardiso, '__version__', '?')} has no '{name}', "
+                "the session needs the internals of pypardiso 0.4.7"
+            )
+        return getattr(self.solver, name)
+
+    def check(self, A: sparse, b: 'Array[F]') -> 'Array[F]':
+        """ Validate A (CSR) & return b as the solver expects it """
+        self._get('_check_A')(A)
+        return self._get('_check_b')(A, b)
+
+    def call(self, phase: int, A: sparse, b: 'Array[F]') -> 'Array[F]':
+        """ Run one [paradiso] phase """
+        self.solver.set_phase(phase)
+        return self._get('_call_pardiso')(A, b)
+
+
+class Session:
+    """ A [paradiso] solver that keeps the symbolic analysis alive
+
+    The analysis (ordering, elimination tree) is done for a
+    base sparsity pattern, later matrices are scattered into
+    that pattern and only refactorized numerically.
+
+    A new analysis is only done when a matrix does not fit:
+    - different size: analyse the new pattern
+    - mostly overlapping: analyse the union of both patterns
+    - otherwise: analyse the new pattern
+
+    Falls back to the public (analyse every solve) pypardiso
+    solve when its internals are missing.
+    """
+
+    def __init__(self, overlap: float = 0.9):
+        # Own solver instance (keeps its own factor)
+        self.solver = PyPardisoSolver()
+        self.internals = Internals(self.solver)
+        # Required pattern overlap to grow the pattern
+        self.overlap = overlap
+        # Analysed pattern
+        self.size = -1
+        self.keys = np.zeros(0, np.int64)
+        # Statistics
+        self.analysed = 0
+        self.reused = 0
+
+    def analyse(self, A: sparse):
+        """ Run the symbolic phase for the pattern of A
+
+        NOTE: the values are used for the scaling & matching
+        """
+        self.size = A.shape[0]
+        self.keys = pattern_keys(A)
+        self.call(ANALYSIS, A, np.zeros((self.size, 1)))
+        self.analysed += 1
+
+    def embed(self, A: sparse) -> sparse:
+        """ Scatter the values of A into the analysed pattern """
+        n = A.shape[0]
+
+        # Different size
+        if n != self.size:
+            self.analyse(A)
+            return A
+
+        K = pattern_keys(A)
+        P = np.searchsorted(self.keys, K)
+        np.minimum(P, self.keys.size - 1, out=P)
+        hit = self.keys[P] == K
+
+        # Does not fit
+        if hit.mean() < self.overlap:
+            self.analyse(A)
+            return A
+
+        # Scatter into the (union) pattern
+        U = self.keys if hit.all() else np.union1d(self.keys, K)
+        M = pattern_matrix(U, n)
+        M.data[np.searchsorted(U, K)] = A.data
+
+        # Mostly fits, grow the pattern
+        if not hit.all():
+            self.analyse(M)
+        else:
+            self.reused += 1
+
+        return M
+
+    def call(self, phase: int, A: sparse, b: 'Array[F]'):
+        return self.internals.call(phase, A, b)
+
+    def solve(self, A: sparse, b: 'Array[F]') -> 'Array[F]':
+        """ Solve: Ax = b (reusing the symbolic analysis) """
+        A = A.tocsr()
+        if not self.internals.available:
+            self.analysed += 1
+            return self.solver.solve(A, b).squeeze()
+        b = self.internals.check(A, b)
+
+        M = self.embed(A)
+        self.call(NUMERIC, M, b)
+        x = self.call(SOLVE, M, b)
+        return x.squeeze()
+
+    def stats(self):
+        return f"analysed: {self.analysed} reused: {self.reused}"
+
+    def release(self):
+        """ Free the memory held by [paradiso] """
+        self.solver.free_memory(everything=True)
+        self.size = -1
@@ -1,7 +1,7 @@
 from ...utils.types import int3, Array, F, I
 from ...debug.time import time
 from ..linalg import coordinates, unpack
-from typing import DefaultDict
+from .hits import HitBuffer
 import numpy as np
 
 class Rasterizer_3D:
@@ -12,23 +12,15 @@ class Rasterizer_3D:
         # Store Z-height
         self.height = sz
 
-        # Configure z-buffer-hash
-        self.empty = np.zeros(0, np.float32)
-        self.stride = sx
-        self.hash: dict[int, 'Array[F]'] = \
-            DefaultDict(lambda: self.empty)
+        # Configure hit buffer
+        self.stride = sy
+        self.hits = HitBuffer()
 
         # Configure xy-space
         self.xy_min = np.zeros(2, np.int32)
         self.xy_max = np.zeros(2, np.int32)
         self.xy_max[:] = [sx, sy]
 
-    def get(self, I: int):
-        x = I % self.stride
-        y = I // self.stride
-        z = np.unique(self.hash[I])
-        return x, y, z
-
     def hit(self, triangle: 'Array[F]', P: 'Array[F]'):
         """ Check if Points lies inside the triangle
 
@@ -139,12 +131,10 @@ class Rasterizer_3D:
         # Calculate points on the triangle plane
         P = self.proj(triangle, points)
 
-        I = coords[:, 0] + (coords[:, 1] * self.stride)
+        I = coords[:, 0] * self.stride + coords[:, 1]
 
-        # Fill Z-buffers
-        for i, z in zip(I, P):
-            # i = int(i)
-            self.hash[i] = np.append(self.hash[i], z)  # type: ignore
+        # Fill hit buffer
+        self.hits.extend(I, P)
 
     @time("3D-raster-run")
     def run(self, indices: 'Array[I]', vertices: 'Array[F]'):
@@ -158,42 +148,12 @@ class Rasterizer_3D:
             self.rasterize(vertices[tri, :])
 
     def voxels(self):
-        # Voxel Grid to fill / return
-        grid = np.zeros(self.shape, np.bool_)
-
-        # Z-indexes for Z-axis
-        s = np.arange(self.height, dtype=np.float32) + 0.5
-
-        for i in self.hash:
-            x, y, z = self.get(i)
-            # Cull non-watertight
-            if z.size < 2:
-                # print("Culled Watertight", z)
-                continue
-            # Find the boolean matrix for voxel-surface-ray-intersection
-            B = s[:, np.newaxis] <= z[np.newaxis, :]
-            # Count ray-intersections
-            C: 'Array[I]' = \
-                np.count_nonzero(B, axis=1)  # type: ignore
-            # intersection modulo 2 means that the voxel is inside the mesh
-            grid[x, y, :] = C % 2
-
-        return grid
+        return self.hits.voxels(self.shape)
 
     def points(self):
-
-        count = sum(l.size for l in self.hash.values())
-        i = 0
-
-        points = np.zeros((count, 3), np.float32)
-        for I in self.hash:
-            x, y, z = self.get(I)
-            XY = np.array([x, y, 1]) + 0.5  # type: ignore
-            print(x, y, z)
-            for v in z:
-                XY[2] = v
-                points[i, :] = XY
-                i += 1
-
+        I, Z = self.hits.arrays()
+        points = np.zeros((I.size, 3), np.float32)
+        points[:, 0] = I // self.stride + 0.5
+        points[:, 1] = I % self.stride + 0.5
+        points[:, 2] = Z
         return points
-
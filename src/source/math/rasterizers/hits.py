@@ -0,0 +1,158 @@
+import numpy as np
+
+from ...utils.types import int3, Array, F, I
+
+
+class HitBuffer:
+    """ Growable storage of surface crossings (pixel, z)
+
+    Hits are written into preallocated chunks, a full chunk
+    is kept as is & a new one is started (no reallocation
+    per hit). Pixels index columns as: x * sy + y
+    """
+
+    # Hits per chunk
+    CHUNK = 1 << 16
+
+    def __init__(self, chunk: int = CHUNK):
+        self.chunk = chunk
+        self.full: list[tuple['Array[I]', 'Array[F]']] = []
+        self._open(chunk)
+
+    def _open(self, size: int):
+        self.pixels = np.empty(size, np.int64)
+        self.depths = np.empty(size, np.float64)
+        self.used = 0
+
+    def _close(self):
+        if self.used:
+            self.full.append((self.pixels[:self.used], self.depths[:self.used]))
+
+    def __len__(self):
+        return self.used + sum(P.size for P, _ in self.full)
+
+    def add(self, pixel: int, z: float):
+        """ Store a single hit """
+        if self.used == self.pixels.size:
+            self._close()
+            self._open(self.chunk)
+        self.pixels[self.used] = pixel
+        self.depths[self.used] = z
+        self.used += 1
+
+    def extend(self, pixels: 'Array[I]', depths: 'Array[F]'):
+        """ Store an array of hits """
+        n = pixels.size
+        if self.used + n > self.pixels.size:
+            self._close()
+            self._open(max(self.chunk, n))
+        self.pixels[self.used:self.used + n] = pixels
+        self.depths[self.used:self.used + n] = depths
+        self.used += n
+
+    def arrays(self):
+        """ All (pixels, depths) as flat arrays """
+        parts = [*self.full, (self.pixels[:self.used], self.depths[:self.used])]
+        return (
+            np.concatenate([P for P, _ in parts]),
+            np.concatenate([Z for _, Z in parts]),
+        )
+
+    def voxels(self, shape: int3, minimum: int = 2, even: bool = False) -> 'Array[np.bool_]':
+        """ Voxel grid of the hits (parity along z, see resolve) """
+        return resolve(*self.arrays(), shape, minimum, even)
+
+
+def columns(pixels: 'Array[I]', depths: 'Array[F]'):
+    """ Hits sorted by (pixel, z) w/o duplicates
+
+    Returns:
+        ::C, Z => sorted hits
+        ::start => index of the first hit per column
+        ::count => hits per column
+    """
+    order = np.lexsort((depths, pixels))
+    C, Z = pixels[order], depths[order]
+    unique = np.ones(C.size, np.bool_)
+    unique[1:] = (C[1:] != C[:-1]) | (Z[1:] != Z[:-1])
+    C, Z = C[unique], Z[unique]
+
+    first = np.ones(C.size, np.bool_)
+    first[1:] = C[1:] != C[:-1]
+    start = np.flatnonzero(first)
+    count = np.diff(np.append(start, C.size))
+    return C, Z, start, count
+
+
+def span(low: 'Array[F]', high: 'Array[F]', h: int):
+    """ Voxels [span0, span1) w/ a center in (low, high] """
+    span0 = np.clip(np.floor(low - 0.5) + 1, 0, h).astype(np.int64)
+    span1 = np.clip(np.floor(high - 0.5) + 1, 0, h).astype(np.int64)
+    return span0, span1
+
+
+def fill(grid: 'Array[np.bool_]', pixels: 'Array[I]', span0: 'Array[I]', span1: 'Array[I]'):
+    """ Set voxel spans of columns (grid as (x * y, h), disjoint spans) """
+    if not pixels.size:
+        return
+    h = grid.shape[1]
+    P, row = np.unique(pixels, return_inverse=True)
+    # Difference array along z, cumulative scan
+    D = np.zeros((P.size, h + 1), np.int8)
+    np.add.at(D, (row, span0), 1)
+    np.add.at(D, (row, span1), -1)
+    grid[P] |= np.cumsum(D[:, :h], axis=1, dtype=np.int8) > 0
+
+
+def resolve(pixels: 'Array[I]', depths: 'Array[F]', shape: int3, minimum: int = 2, even: bool = False) -> 'Array[np.bool_]':
+    """ Fill voxels w/ an odd count of hits above their center
+
+    Duplicated hits are counted once, columns w/ less than
+    {minimum} hits are cut (not watertight). If {even}, all
+    columns w/ an odd count are left empty.
+    """
+    x, y, h = shape
+    grid = np.zeros((x * y, h), np.bool_)
+    if not pixels.size:
+        return grid.reshape(shape)
+
+    C, Z, start, count = columns(pixels, depths)
+    first = np.zeros(C.size, np.bool_)
+    first[start] = True
+
+    # Rank from the top
+    top = np.repeat(start + count, count) - np.arange(C.size)
+
+    # Inside spans: voxel centers in (z[i-1], z[i]] for odd ranks
+    # from the top (the lowest span is open below)
+    keep = count >= minimum
+    if even:
+        keep &= count % 2 == 0
+    end = np.repeat(keep, count) & (top % 2 == 1)
+    low = np.where(first, -np.inf, np.roll(Z, 1))[end]
+    fill(grid, C[end], *span(low, Z[end], h))
+    return grid.reshape(shape)
+
+
+def segments(pixels: 'Array[I]', depths: 'Array[F]', h: int):
+    """ Voxel spans between the hits of columns w/ an odd count of hits
+
+    Returns:
+        ::P => pixel of each span
+        ::span0, span1 => voxels of each span (none empty)
+    """
+    C, Z, start, count = columns(pixels, depths)
+    first = np.zeros(C.size, np.bool_)
+    first[start] = True
+    last = np.roll(first, -1)
+    odd = np.repeat(count % 2 == 1, count)
+    C, Z, first, last = C[odd], Z[odd], first[odd], last[odd]
+
+    # Below every hit & above the last one of a column
+    P = np.concatenate([C, C[last]])
+    low = np.concatenate([np.where(first, -np.inf, np.roll(Z, 1)), Z[last]])
+    high = np.concatenate([Z, np.full(int(last.sum()), np.inf)])
+    span0, span1 = span(low, high, h)
+
+    some = span1 > span0
+    return P[some], span0[some], span1[some]
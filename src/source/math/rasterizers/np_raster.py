@@ -1,34 +1,23 @@
-from collections import defaultdict
-
 from ...utils.types import int3, Array, F, I
 from ..linalg import unpack
+from .hits import HitBuffer, resolve
 import numpy as np
 import glm
 
-EMPTY = np.zeros(0, np.float32)
-
 
 class Z_Hash_Rasterizer:
 
     def __init__(self, shape: int3):
         self.shape = x, y, z = shape
-        self.stride = x
+        self.stride = y
         self.height = z
-        self.zhash: dict[int, 'Array[F]'] = \
-            defaultdict(lambda: EMPTY)
+        self.hits = HitBuffer()
         self.xy_min = np.zeros(2, np.int32)
         self.xy_max = np.zeros(2, np.int32)
         self.xy_max[:] = x, y
 
     def plot(self, x: int, y: int, z: float):
-        I = x + y * self.stride
-        self.zhash[I] = np.append(self.zhash[I], z)  # type: ignore
-
-    def get(self, I: int):
-        x = I % self.stride
-        y = I // self.stride
-        z = np.unique(self.zhash[I])
-        return x, y, z
+        self.hits.add(x * self.stride + y, z)
 
     def rasterize(self, X: 'Array[F]', Y: 'Array[F]', Z: 'Array[F]'):
         x, y, _ = self.shape
@@ -46,8 +35,8 @@ class Z_Hash_Rasterizer:
             B, BX, BY = barycentric(X, Y)
         except ZeroDivisionError:
             # Triangle spans zero area
-            return 
-            
+            return
+
         bz = glm.vec3(Z[0], Z[1], Z[2])
 
         # Setup barycentric coord in (lx, ly)
@@ -87,31 +76,15 @@ class Z_Hash_Rasterizer:
             self.rasterize(X, Y, Z)
 
     def voxels(self):
-        # Voxel Grid to fill / return
-        grid = np.zeros(self.shape, np.bool_)
-
-        # Z-indexes for Z-axis
-        s = np.arange(self.height, dtype=np.float32) + 0.5
-
-        for i in self.zhash:
-            x, y, z = self.get(i)
-            if z.size == 1:
-                print("cut")
-                continue
-            # Find the boolean matrix for voxel-surface-ray-intersection
-            B = s[:, np.newaxis] <= z[np.newaxis, :]
-            # Count ray-intersections
-            C = np.count_nonzero(B, axis=1)  # type: ignore
-            # intersection modulo 2 means that the voxel is inside the mesh
-            grid[x, y, :] = C % 2
-
-        return grid
+        return self.hits.voxels(self.shape)
+
 
 def minmax(V: 'Array[F]', h: int):
     lv = max(round(V.min()), 0)
     hv = min(round(V.max()), h)
     return lv, hv
 
+
 def barycentric(X: 'Array[F]', Y: 'Array[F]'):
     """ Compute the Barycentric linear set for any convex polygon
 
@@ -143,7 +116,7 @@ def barycentric(X: 'Array[F]', Y: 'Array[F]'):
     X1 = glm.vec3(x2, x0, x1)
     Y0 = glm.vec3(y1, y2, y0)
     Y1 = glm.vec3(y2, y0, y1)
-    
+
     # Calculate doubled signed area
     area = glm.dot(X0, Y1) - glm.dot(Y0, X1)
     # print(area)
@@ -167,3 +140,104 @@ def barycentric(X: 'Array[F]', Y: 'Array[F]'):
     # Return Linear set
     return B, BX, BY
 
+
+class Vector_Rasterizer:
+    """ Z_Hash_Rasterizer w/ every step vectorized
+
+    Triangles are rasterized in batches (candidate pixels by
+    broadcasting) into a flat hit buffer. A {band} of x [lx, hx)
+    limits it to a tile of the screen (independent of the rest).
+    """
+
+    # Candidate pixels per batch
+    BATCH = 1 << 20
+
+    def __init__(self, shape: int3, band: tuple[int, int] | None = None):
+        self.shape = shape
+        self.band = band or (0, shape[0])
+        self.hits = HitBuffer()
+
+    def run(self, indices: 'Array[I]', vertices: 'Array[F]'):
+        assert indices.shape[1] == 3, \
+            " Indices must be on the form [Nx3] to represent triangles !"
+
+        assert vertices.shape[1] == 3, \
+            " Vertices must be on the form [Nx3] to represent vertices !"
+
+        _, y, _ = self.shape
+        b0, b1 = self.band
+        T = vertices.astype(np.float64)[indices]
+        X, Y, Z = T[:, :, 0], T[:, :, 1], T[:, :, 2]
+
+        # Pixels w/ a center inside the bounds (& band)
+        lx = np.maximum(np.ceil(X.min(axis=1) - 0.5), b0).astype(np.int64)
+        hx = np.minimum(np.floor(X.max(axis=1) - 0.5) + 1, b1).astype(np.int64)
+        ly = np.maximum(np.ceil(Y.min(axis=1) - 0.5), 0).astype(np.int64)
+        hy = np.minimum(np.floor(Y.max(axis=1) - 0.5) + 1, y).astype(np.int64)
+
+        # Edges opposite of each vertex (i -> j)
+        X0, X1 = np.roll(X, -1, axis=1), np.roll(X, -2, axis=1)
+        Y0, Y1 = np.roll(Y, -1, axis=1), np.roll(Y, -2, axis=1)
+        area = np.sum(X0 * Y1 - Y0 * X1, axis=1)
+
+        # Cut away tris w/o pixels or area
+        keep = (lx < hx) & (ly < hy) & (area != 0.0)
+        X0, X1, Y0, Y1, Z = X0[keep], X1[keep], Y0[keep], Y1[keep], Z[keep]
+        area = area[keep, None]
+
+        # Edges in a shared (sorted) direction, so a pixel on an edge
+        # gets the same edge function in both of its triangles
+        swap = (X0 > X1) | ((X0 == X1) & (Y0 > Y1))
+        sign = np.where(swap, -1.0, 1.0)
+        edges = (
+            np.where(swap, X1, X0),
+            np.where(swap, Y1, Y0),
+            sign * (X1 - X0),
+            sign * (Y1 - Y0),
+            sign / area,
+        )
+
+        # Pixels exactly on an edge belong to the side of a (tiny)
+        # shift of +x (& +y if the edge is horizontal)
+        DX, DY = X1 - X0, Y1 - Y0
+        tie = np.where(DY != 0.0, -DY, DX) * area > 0.0
+
+        w = (hx - lx)[keep]
+        n = w * (hy - ly)[keep]
+        lx, ly = lx[keep], ly[keep]
+
+        # Batches of triangles (by candidate pixels)
+        end = np.cumsum(n)
+        start = 0
+        while start < n.size:
+            stop = max(int(np.searchsorted(end, end[start] - n[start] + self.BATCH, 'right')), start + 1)
+            self._batch(slice(start, stop), lx, ly, w, n, edges, tie, Z)
+            start = stop
+
+    def _batch(self, S: slice, lx, ly, w, n, edges, tie, Z):
+        # Candidate pixels of every triangle (flat)
+        N = n[S]
+        T = np.repeat(np.arange(N.size), N)
+        K = np.arange(T.size) - np.repeat(np.cumsum(N) - N, N)
+        W = w[S][T]
+        px = lx[S][T] + K % W
+        py = ly[S][T] + K // W
+
+        # Edge functions & barycentric coords at the pixel centers
+        AX, AY, DX, DY, A = (e[S][T] for e in edges)
+        E = DX * (py + 0.5)[:, None] - DX * AY - DY * (px + 0.5)[:, None] + DY * AX
+        b = E * A
+        inside = np.all((b > 0.0) | ((E == 0.0) & tie[S][T]), axis=1)
+
+        # Interpolated z of hits
+        self.hits.extend(
+            px[inside] * self.shape[1] + py[inside],
+            np.einsum('ij,ij->i', b[inside], Z[S][T[inside]]),
+        )
+
+    def voxels(self):
+        """ Voxel grid of the band (x in [lx, hx)) """
+        _, y, h = self.shape
+        b0, b1 = self.band
+        pixels, depths = self.hits.arrays()
+        return resolve(pixels - b0 * y, depths, (b1 - b0, y, h))
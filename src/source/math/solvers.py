@@ -0,0 +1,266 @@
+"""
+Sparse solver backends for the truss stiffness system
+
+Backends register themselves by name:
+- pardiso : [paradiso] LU w/ reused symbolic analysis (default)
+- superlu : scipy SuperLU
+- cholmod : scikit-sparse Cholesky (if installed)
+- pcg     : Jacobi preconditioned conjugate gradient
+- matrix-free : block-Jacobi PCG w/o an assembled matrix
+- multigrid : lattice multigrid preconditioned CG
+
+The backend is picked by name, from the configuration
+or from the {VOXEL_SOLVER} environment variable.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from timeit import default_timer as tick
+from typing import Dict
+import os
+
+from scipy.sparse import csr_matrix as sparse, diags
+import scipy.sparse.linalg as sla
+import numpy as np
+
+from ..utils.types import Array, F, B
+from .pardiso import Session
+from .multigrid import Multigrid
+from ..data.truss import Truss
+
+try:
+    from sksparse.cholmod import cholesky  # type: ignore
+except ImportError:
+    cholesky = None
+
+Operator = sparse | sla.LinearOperator
+
+__all__ = ['Solver', 'Result', 'get', 'shared', 'default', 'names']
+
+ENV = "VOXEL_SOLVER"
+DEFAULT = "pardiso"
+
+
+@dataclass
+class Result:
+    """ Outcome of a single solve """
+    x: 'Array[F]'
+    time: float
+    residual: float
+
+
+class Solver:
+    __all__: Dict[str, type[Solver]] = {}
+    NAME: str
+    # Solve w/ a StressOperator instead of the assembled matrix
+    MATRIX_FREE = False
+    # Starts from the initial guess (iterative backends)
+    WARM = False
+
+    def __init_subclass__(cls, name: str) -> None:
+        cls.NAME = name
+        Solver.__all__[name] = cls
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.residual = 0.0
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    def bind(self, truss: Truss, axes: 'Array[B]'):
+        """ Receive the truss & its system axes before solving (for structure aware backends) """
+        pass
+
+    def run(self, A: Operator, b: 'Array[F]', x0: 'Array[F] | None' = None) -> 'Array[F]':
+        """ Solve (direct backends ignore the initial guess {x0}) """
+        raise NotImplementedError(f"Missing Solver: {self.NAME}")
+
+    def solve(self, A: Operator, b: 'Array[F]', x0: 'Array[F] | None' = None) -> Result:
+        """ Solve: Ax = b (timed, w/ relative residual) """
+        b = np.asarray(b, np.float64).reshape(A.shape[0], -1)
+        if x0 is not None:
+            x0 = np.asarray(x0, np.float64).reshape(b.shape)
+
+        start = tick()
+        x = np.asarray(self.run(A, b, x0)).reshape(b.shape)
+        time = tick() - start
+
+        # Relative residual |Ax - b| / |b|
+        norm = np.linalg.norm(b) or 1.0
+        residual = float(np.linalg.norm(A @ x - b) / norm)
+
+        # Track statistics
+        self.count += 1
+        self.time += time
+        self.residual = max(self.residual, residual)
+
+        return Result(x.squeeze(), time, residual)
+
+    def counters(self) -> Dict[str, float]:
+        """ Running totals (the residual is the worst so far) """
+        return {"count": self.count, "time": self.time, "residual": self.residual}
+
+    def since(self, before: Dict[str, float]) -> Dict[str, float]:
+        """ Counters added after {before} (ie. by one task) """
+        return {k: v if k == "residual" else v - before[k] for k, v in self.counters().items()}
+
+    def merge(self, counters: Dict[str, float]):
+        """ Add the counters of another instance (ie. a worker process) """
+        self.count += int(counters["count"])
+        self.time += counters["time"]
+        self.residual = max(self.residual, counters["residual"])
+
+    def stats(self):
+        return (
+            f"{self.NAME} solves: {self.count}"
+            f" time: {self.time:3.3f}"
+            f" residual: {self.residual:.2e}"
+        )
+
+
+class _(Solver, name="pardiso"):
+    """ [paradiso] LU, reusing the symbolic analysis """
+
+    def __init__(self):
+        super().__init__()
+        self.session = Session()
+
+    def run(self, A, b, x0=None):
+        return self.session.solve(A, b)
+
+    def counters(self):
+        S = self.session
+        return {**super().counters(), "analysed": S.analysed, "reused": S.reused}
+
+    def merge(self, counters):
+        super().merge(counters)
+        self.session.analysed += int(counters["analysed"])
+        self.session.reused += int(counters["reused"])
+
+    def stats(self):
+        return f"{super().stats()} {self.session.stats()}"
+
+
+class _(Solver, name="superlu"):
+    """ scipy SuperLU (general LU) """
+
+    def run(self, A, b, x0=None):
+        return sla.splu(A.tocsc()).solve(b)
+
+
+class _(Solver, name="cholmod"):
+    """ CHOLMOD Cholesky (the reduced system is SPD) """
+
+    @classmethod
+    def available(cls) -> bool:
+        return cholesky is not None
+
+    def run(self, A, b, x0=None):
+        return cholesky(A.tocsc())(b)  # type: ignore
+
+
+def conjugate_gradient(A: Operator, b: 'Array[F]', x0: 'Array[F] | None', P: Operator, rtol: float, maxiter: int | None):
+    """ Preconditioned CG per right hand side (warm started by {x0}) """
+    X = np.empty_like(b)
+    for i in range(b.shape[1]):
+        g = None if x0 is None else x0[:, i]
+        X[:, i], info = sla.cg(A, b[:, i], x0=g, rtol=rtol, maxiter=maxiter, M=P)
+        if info > 0:
+            print(f"[cg] no convergence after {info} iterations")
+    return X
+
+
+class _(Solver, name="pcg"):
+    """ Jacobi preconditioned conjugate gradient """
+    WARM = True
+
+    def __init__(self, rtol: float = 1E-8, maxiter: int | None = None):
+        super().__init__()
+        self.rtol = rtol
+        self.maxiter = maxiter
+
+    def run(self, A, b, x0=None):
+        # Jacobi preconditioner
+        P = diags(np.reciprocal(A.diagonal()))
+        return conjugate_gradient(A, b, x0, P, self.rtol, self.maxiter)
+
+
+class _(Solver, name="matrix-free"):
+    """ Block-Jacobi PCG on the matrix-free StressOperator """
+    WARM = True
+    MATRIX_FREE = True
+
+    def __init__(self, rtol: float = 1E-8, maxiter: int | None = None, kind: str = 'block'):
+        super().__init__()
+        self.rtol = rtol
+        self.maxiter = maxiter
+        self.kind = kind
+
+    def run(self, A, b, x0=None):
+        P = A.preconditioner(self.kind)
+        return conjugate_gradient(A, b, x0, P, self.rtol, self.maxiter)
+
+
+class _(Solver, name="multigrid"):
+    """ Lattice multigrid, as CG preconditioner (or standalone V-cycles) """
+    WARM = True
+
+    def __init__(self, rtol: float = 1E-8, maxiter: int | None = None, krylov: bool = True):
+        super().__init__()
+        self.rtol = rtol
+        self.maxiter = maxiter
+        self.krylov = krylov
+
+    def bind(self, truss, axes):
+        # Lattice coordinates & system axes of the nodes
+        self.coords = np.floor(truss.nodes).astype(np.int64)
+        self.free = axes
+
+    def run(self, A, b, x0=None):
+        MG = Multigrid(A, self.coords, self.free)
+        if self.krylov:
+            return conjugate_gradient(A, b, x0, MG.preconditioner(), self.rtol, self.maxiter)
+        X = np.empty_like(b)
+        for i in range(b.shape[1]):
+            g = None if x0 is None else x0[:, i]
+            X[:, i] = MG.solve(A, b[:, i], g, self.rtol, self.maxiter or 200)
+        return X
+
+
+def names():
+    """ Names of the usable backends """
+    return [k for k, v in Solver.__all__.items() if v.available()]
+
+
+def default():
+    """ Backend name from the environment (or the default) """
+    return os.environ.get(ENV, DEFAULT)
+
+
+__shared__ = dict[str, Solver]()
+
+
+def get(name: str | None = None) -> Solver:
+    """ Instance a backend by name """
+    name = (name or default()).strip().lower()
+
+    if name not in Solver.__all__:
+        valid = ",".join(f'"{k}"' for k in Solver.__all__)
+        raise KeyError(f"Unknown solver: \"{name}\" (valid: {valid})")
+
+    cls = Solver.__all__[name]
+    if not cls.available():
+        raise ImportError(f"Solver is not installed: \"{name}\"")
+
+    return cls()
+
+
+def shared(name: str | None = None) -> Solver:
+    """ Get or instance a process wide backend by name """
+    name = (name or default()).strip().lower()
+    if name not in __shared__:
+        __shared__[name] = get(name)
+    return __shared__[name]
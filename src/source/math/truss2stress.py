@@ -1,14 +1,16 @@
 # pyright: reportConstantRedefinition=false
 from typing import Union, Any
 
-from ..utils.types import Array, F, I
+from ..utils.types import Array, F, I, B
 from ..data.truss import Truss
 from scipy.sparse import (
     csr_matrix as sparse,
     csc_matrix as vector,
 )
+from scipy.sparse.linalg import LinearOperator
 import numpy as np
-import pypardiso.scipy_aliases as par
+
+from .solvers import Solver, shared
 
 
 def force_vector(truss: Truss):
@@ -18,11 +20,35 @@ def force_vector(truss: Truss):
     return F[~S, None]
 
 
-def solve(A: sparse, b: Array[F]) -> vector | None:
-    """ Solve: Ax = b """
+def system_axes(truss: Truss, M: 'sparse | LinearOperator') -> 'Array[B]':
+    """ Node axes of a stress system [node, axis]
+
+    Free axes, or every axis when the matrix spans all of them
+    (static axes as identity rows, see incremental.Incremental).
+    """
+    if M.shape[0] == truss.static.size:
+        return np.ones_like(truss.static)
+    return ~truss.static
+
+
+def force_matrix(truss: Truss, axes: 'Array[B] | None' = None):
+    """ Forces per load case [system axis, case] (primary + extra loads) """
+    S = truss.static
+    A = ~S if axes is None else axes
+    L = truss.loads if truss.loads is not None else []
+    # Remove force on static
+    return np.stack([np.where(S, 0.0, F)[A] for F in (truss.forces, *L)], axis=1)
+
+
+def solve(A: sparse, b: Array[F], solver: Solver | None = None, x0: Array[F] | None = None) -> vector | None:
+    """ Solve: Ax = b (iterative backends start from {x0}) """
+
+    # [default] solver
+    if solver is None:
+        solver = shared()
 
-    # [paradiso] solver
-    x = par.spsolve(A, b)
+    # Registered backend
+    x = solver.solve(A, b, x0).x
 
     # Do not propagate NaN
     if np.isnan(x).all():
@@ -73,21 +99,52 @@ def accumulate_columns(C: 'Array[F]', E0: 'Array[I]', E1: 'Array[I]', Q: 'Array[
         inplace_accumulate(C[:, col], E1, Q[:, col])
 
 
+def accumulate_bincount(C: 'Array[F]', E0: 'Array[I]', E1: 'Array[I]', Q: 'Array[F]'):
+    # Single native reduction
+    # Flat (node, column) bins
+    # no <np.add.at> scatter
+    R, K = C.shape
+    col = np.arange(K, dtype=np.int64)
+    B0 = (E0.astype(np.int64)[:, None] * K + col).ravel()
+    B1 = (E1.astype(np.int64)[:, None] * K + col).ravel()
+    W = Q.ravel()
+    S = np.bincount(B0, W, minlength=R * K)
+    S += np.bincount(B1, W, minlength=R * K)
+    C += S.reshape(R, K)
+
+
 def flat_join(*arrays: 'Array[F]') -> 'Array[F]':
     return np.concatenate([a.flatten() for a in arrays])
 
 
-def stress_matrix(truss: Truss, elasticity: float = 2E9):
+def sorted_csr(V: 'Array[F]', I: 'Array[I]', J: 'Array[I]', size: int) -> sparse:
+    """ Build a CSR matrix from unique (I, J, V) triplets
+
+    The triplets are ordered by (row, column) up front,
+    so the matrix is emitted with sorted indices and no
+    duplicate summation / re-sorting is needed downstream.
+    """
+    # Linear (row, column) key
+    key = I.astype(np.int64) * size + J
+    order = np.argsort(key)
+
+    # Row pointers
+    count = np.bincount(I, minlength=size)
+    indptr = np.zeros(size + 1, np.int64)
+    np.cumsum(count, out=indptr[1:])
+
+    M = sparse((V[order], J[order], indptr), shape=(size, size))
+    M.has_sorted_indices = True
+    return M
+
+
+def edge_kernels(truss: Truss, elasticity: float):
+    """ Edge endpoints, unit directions & axial stiffness """
     # Upack needed parts of truss
-    S = truss.static
     A = truss.areas
     N = truss.nodes
     E = truss.edges
 
-    # Node Count * Degree of freedom
-    L, DOF = N.shape
-    N_DOF = L * DOF
-
     # Edge from <-> to
     E0 = E[:, 0]
     E1 = E[:, 1]
@@ -101,17 +158,78 @@ def stress_matrix(truss: Truss, elasticity: float = 2E9):
     # cosinus thetas for force distribution
     inplace_multiply(D, L[:, None])
 
+    # axial stiffness
+    O = L * A * elasticity
+
+    return E0, E1, D, O
+
+
+def node_kernels(size: int, E0: 'Array[I]', E1: 'Array[I]', Q: 'Array[F]'):
+    """ Accumulate the edge kernels onto their nodes """
+    C = np.zeros((size, Q.shape[1]), np.float64)
+    # Choose <one> measure !
+    # accumulate_rows(C, E0, E1, Q)
+    # accumulate_columns(C, E0, E1, Q)
+    accumulate_bincount(C, E0, E1, Q)
+    return C
+
+
+def edge_triplets(E0: 'Array[I]', E1: 'Array[I]', D: 'Array[F]', O: 'Array[F]'):
+    """ Unreduced stiffness triplets of edges (node axis = node * DOF + axis)
+
+    Duplicates are not summed, node blocks are kept structural
+    while zeros in the edge blocks (axis aligned edges) are dropped.
+    """
+    DOF = D.shape[1]
+
+    # Row wise outer product
+    # to obtain stress kernels
+    Q = outer_rows(D).reshape(D.shape[0], DOF * DOF).astype(np.float64)
+    inplace_multiply(Q, O[:, None])
+
+    # (row, column) axis within a block
+    axis = np.arange(DOF, dtype=np.int64)
+    R = np.repeat(axis, DOF)
+    C = np.tile(axis, DOF)
+
+    def block(A: 'Array[I]', B: 'Array[I]'):
+        A = A.astype(np.int64)[:, None] * DOF
+        B = B.astype(np.int64)[:, None] * DOF
+        return (A + R).ravel(), (B + C).ravel()
+
+    # Node blocks (+) & half-edge blocks (-)
+    I0, J0 = block(E0, E0)
+    I1, J1 = block(E1, E1)
+    I2, J2 = block(E0, E1)
+    I3, J3 = block(E1, E0)
+    N = Q.ravel()
+    KEEP = N != 0.0
+
+    I = np.concatenate([I0, I1, I2[KEEP], I3[KEEP]])
+    J = np.concatenate([J0, J1, J2[KEEP], J3[KEEP]])
+    V = np.concatenate([N, N, -N[KEEP], -N[KEEP]])
+    return I, J, V
+
+
+def stress_matrix(truss: Truss, elasticity: float = 2E9):
+    # Upack needed parts of truss
+    S = truss.static
+    N = truss.nodes
+
+    # Node Count * Degree of freedom
+    L, DOF = N.shape
+    N_DOF = L * DOF
+
+    # Edge directions & stiffness
+    E0, E1, D, O = edge_kernels(truss, elasticity)
+
     # Row wise outer product
     # to obtain stress kernels
     Q = outer_rows(D).reshape(D.shape[0], -1)
-    O = L * A * elasticity
     inplace_multiply(Q, O[:, None])
 
     # Accumulate node stress kernels
-    C = np.zeros((N.shape[0], Q.shape[1]), np.float64)
-    # Choose <one> measure !
-    # accumulate_rows(C, E0, E1, Q)
-    accumulate_columns(C, E0, E1, Q)
+    C = node_kernels(N.shape[0], E0, E1, Q)
 
     # negate edge kernels
     inplace_negate(Q)
@@ -140,26 +258,116 @@ def stress_matrix(truss: Truss, elasticity: float = 2E9):
     CJ: 'Array[F]' = np.repeat(ID, DOF, axis=1)  # type: ignore
     J = flat_join(CJ, CJ[E1, :], CJ[E0, :])
 
+    # Keep node blocks structural (their zeros are value dependent
+    # cancellations, a stable pattern lets solvers reuse their analysis)
+    NODE = np.zeros(V.size, np.bool_)
+    NODE[:C.size] = True
+
     # Destroy Statically Locked Node Axes
-    KEEP = (J != -1) & (I != -1) & (V != 0.0)
+    KEEP = (J != -1) & (I != -1) & ((V != 0.0) | NODE)
     V = V[KEEP]
     I = I[KEEP]
     J = J[KEEP]
-    # TODO: are the indices sorted (I, J) ?
-    # we can use that knowledge to speed up solving ...
 
     # Build sparse matrix
-    M = sparse((V, (I, J)), shape=(L_DOF, L_DOF))
+    # (each (I, J) pair is unique: one node block + two half-edge blocks)
+    M = sorted_csr(V, I, J, L_DOF)
 
     return M
 
 
-def displacements(truss: Truss, U: vector):
+class StressOperator(LinearOperator):
+    """ Matrix-free stress matrix: K @ u straight from the truss edges
+
+    Only the free (non static) axes are part of the system,
+    memory grows with the edge count instead of the factor fill-in.
+
+    The edges are kept as a scaled incidence matrix C (K = C^T C),
+    at most 2 x DOF entries per edge, so a product is two sparse
+    passes instead of a gather & a scatter per axis.
+    """
+
+    def __init__(self, truss: Truss, elasticity: float = 2E9):
+        self.free = ~truss.static
+        self.E0, self.E1, self.D, self.O = edge_kernels(truss, elasticity)
+        L, DOF = self.free.shape
+        M = self.E0.size
+        size = int(np.sum(self.free))
+        super().__init__(np.float64, (size, size))
+
+        # System index per node axis (locked axes are dropped)
+        I = np.full((L, DOF), size, np.int64)
+        I[self.free] = np.arange(size)
+        cols = np.concatenate([I[self.E0], I[self.E1]], axis=1).ravel()
+
+        # Edge rows: sqrt(O) D (+from, -to)
+        W = np.sqrt(self.O)[:, None] * self.D
+        vals = np.concatenate([W, -W], axis=1).ravel()
+        rows = np.repeat(np.arange(M), 2 * DOF)
+        used = cols < size
+        self.C = sparse((vals[used], (rows[used], cols[used])), shape=(M, size))
+
+    def _matvec(self, x: 'Array[F]') -> 'Array[F]':
+        # Edge elongation (scaled), summed back onto the axes
+        return self.C.T @ (self.C @ np.ravel(x))
+
+    def _adjoint(self):
+        # Symmetric
+        return self
+
+    def blocks(self) -> 'Array[F]':
+        """ Node (DOF x DOF) diagonal blocks """
+        L, DOF = self.free.shape
+        Q = outer_rows(self.D).reshape(self.D.shape[0], -1)
+        inplace_multiply(Q, self.O[:, None])
+        C = node_kernels(L, self.E0, self.E1, Q)
+        return C.reshape(L, DOF, DOF)
+
+    def preconditioner(self, kind: str = 'block') -> LinearOperator:
+        """ Jacobi ('jacobi') or block-Jacobi ('block') preconditioner """
+        F = self.free
+        C = self.blocks()
+        i = np.arange(F.shape[1])
+
+        # Decouple locked axes
+        C[~F, :] = 0.0
+        C.transpose(0, 2, 1)[~F, :] = 0.0
+
+        # Locked / unconnected axes -> identity
+        diag = C[:, i, i]
+        diag[diag == 0.0] = 1.0
+        C[:, i, i] = diag
+
+        if kind == 'jacobi':
+            P = np.reciprocal(diag[F])
+            return LinearOperator(self.shape, lambda x: P * np.ravel(x), dtype=np.float64)
+
+        if kind != 'block':
+            raise KeyError(f"Unknown preconditioner: \"{kind}\" (valid: \"jacobi\",\"block\")")
+
+        # Singular blocks (ie. collinear edges) fall back to Jacobi
+        bad = np.abs(np.linalg.det(C)) <= np.abs(diag).prod(axis=1) * 1E-10
+        J = np.zeros_like(C[bad])
+        J[:, i, i] = diag[bad]
+        C[bad] = J
+
+        B = np.linalg.inv(C)
+
+        def apply(x: 'Array[F]'):
+            U = np.zeros(F.shape, np.float64)
+            U[F] = np.ravel(x)
+            return np.einsum('nij,nj->ni', B, U)[F]
+
+        return LinearOperator(self.shape, apply, dtype=np.float64)
+
+
+def displacements(truss: Truss, U: vector, axes: 'Array[B] | None' = None):
     """ Displacement array for vertices """
     S = truss.static
     D = np.zeros(S.shape, np.float32)
     # Fill non static with deplacement
-    D[~S] = U
+    D[~S if axes is None else axes] = U
+    D[S] = 0.0
     return D
 
 
@@ -193,19 +401,67 @@ def edge_stress(truss: Truss, DU: 'Array[F]', elasticity: float = 1E9):
     return S
 
 
-def fem_simulate(truss: Truss, elasticity: float = 1E9):
+def initial_guess(truss: Truss, guess: 'Array[F] | None', axes: 'Array[B] | None' = None):
+    """ System axes of a node displacement guess (optionally per load case) """
+    if guess is None:
+        return None
+    A = ~truss.static if axes is None else axes
+    if guess.ndim == 3:
+        return np.stack([G[A] for G in guess], axis=1).astype(np.float64)
+    return guess[A, None].astype(np.float64)
+
+
+def stress_system(truss: Truss, elasticity: float, solver: Solver | None, matrix: sparse | None = None):
+    """ Pick the solver & build the matching stress matrix / operator
+
+    A prebuilt stress {matrix} (ie. an incremental update) is used as is.
+    """
+    # [default] solver
+    if solver is None:
+        solver = shared()
     # print("Building matrix")
-    M = stress_matrix(truss, elasticity)
+    if solver.MATRIX_FREE:
+        M = StressOperator(truss, elasticity)
+    elif matrix is not None:
+        M = matrix
+    else:
+        M = stress_matrix(truss, elasticity)
+    axes = system_axes(truss, M)
+    solver.bind(truss, axes)
+    return M, solver, axes
+
+
+def fem_simulate(truss: Truss, elasticity: float = 1E9, solver: Solver | None = None, guess: 'Array[F] | None' = None):
+    M, solver, _ = stress_system(truss, elasticity, solver)
     # print("shape", M.shape)
     # print("Making vector")
     # scipy.sparse.linalg.factorized
     F = force_vector(truss)
     # print("forces", F.shape)
     # print("Solving sparse")
-    U = solve(M, F)
+    U = solve(M, F, solver, initial_guess(truss, guess))
     if U is None:
         return None, None
     # print("Unpacking result")
     D = displacements(truss, U)
     E = edge_stress(truss, D, elasticity)
     return D, E
+
+
+def fem_simulate_loads(truss: Truss, elasticity: float = 1E9, solver: Solver | None = None, guess: 'Array[F] | None' = None, matrix: sparse | None = None):
+    """ Simulate every load case w/ a single factorization
+
+    Returns:
+        ::D => [case, node, axis] displacements
+        ::E => [case, edge] edge compression
+    """
+    M, solver, axes = stress_system(truss, elasticity, solver, matrix)
+    # Block of right hand sides
+    F = force_matrix(truss, axes)
+    U = solve(M, F, solver, initial_guess(truss, guess, axes))
+    if U is None:
+        return None, None
+    U = U.reshape(F.shape)
+    D = np.stack([displacements(truss, U[:, k], axes) for k in range(F.shape[1])])
+    E = np.stack([edge_stress(truss, d, elasticity) for d in D])
+    return D, E
@@ -3,11 +3,22 @@ import source.data.voxels as v
 import source.utils.types as t
 import numpy as np
 
-__all__ = ['voxels2truss', 'TrussBuilder']
+__all__ = ['voxels2truss', 'TrussBuilder', 'SparseTrussBuilder']
 
 
-def voxels2truss(voxels: v.Voxels, exclude: list[str] = []):
-    builder = TrussBuilder(voxels)
+# Occupancy below which the sparse builder is faster
+SPARSE_FILL = 0.25
+
+
+def voxels2truss(voxels: v.Voxels | v.SparseVoxels, exclude: list[str] = []):
+    # Thin structures in big boxes (same truss either way)
+    if isinstance(voxels, v.Voxels):
+        if np.count_nonzero(voxels.grid) < SPARSE_FILL * voxels.grid.size:
+            voxels = voxels.sparse()
+    if isinstance(voxels, v.SparseVoxels):
+        builder = SparseTrussBuilder(voxels)
+    else:
+        builder = TrussBuilder(voxels)
     if 'faces' not in exclude:
         builder.run(TrussBuilder.FACES)
     if 'edges' not in exclude:
@@ -79,13 +90,15 @@ class TrussBuilder:
         self.index_table = np.zeros(voxels.shape, np.uint32)
         self.index_table[I] = range(len(self.vertices))
         # Strength Per Vertex
-        self.strength = voxels.strength[I]
+        self.strength = voxels.strength[I].astype(np.float64)
         # Material Mapping
         Materials: slice = voxels.grid[I] # type: ignore
         # Static Locks Per Vertex
         self.static = voxels.static_map()[Materials, :]
         # Forces Per Vertex
         self.forces = voxels.force_map()[Materials, :]
+        # Extra Load Cases Per Vertex
+        self.loads = voxels.load_maps()[:, Materials, :]
 
         # NOTE
         # {forces} should probably be scaled by # of vertices
@@ -112,4 +125,51 @@ class TrussBuilder:
             static=self.static,
             edges=edges,
             areas=areas,
+            loads=self.loads,
         )
+
+
+class SparseTrussBuilder(TrussBuilder):
+    """ TrussBuilder over the occupied voxels only
+
+    Neighbours are found by binary search in the sorted
+    linear index, nodes & edges come out in the same order
+    as the dense builder (C order of the grid).
+    """
+
+    def __init__(self, voxels: v.SparseVoxels):
+        self.edges: 'list[np.ndarray[np.uint32]]' = []
+        # Grid Shape
+        self.shape = voxels.shape
+        # Occupied voxels
+        self.voxels = voxels
+        self.coords = voxels.coords()
+        # Vertex Array (x+0.5, y+0.5, z+0.5) [centered in voxels]
+        self.vertices = self.coords.astype(np.float32)
+        self.vertices += np.float32(0.5)
+        # Strength Per Vertex
+        self.strength = voxels.strength
+        # Material Mapping
+        Materials = voxels.material
+        # Static Locks Per Vertex
+        self.static = voxels.static_map()[Materials, :]
+        # Forces Per Vertex
+        self.forces = voxels.force_map()[Materials, :]
+        # Extra Load Cases Per Vertex
+        self.loads = voxels.load_maps()[:, Materials, :]
+
+    def get_edges(self, offset: t.int3):
+        index = self.voxels.index
+        if not index.size:
+            self.edges.append(np.zeros((0, 2), np.uint32))
+            return
+        # Neighbours inside the grid
+        C = self.coords + offset
+        a = np.nonzero(np.all((C >= 0) & (C < self.shape), axis=1))[0]
+        # Linear index of the neighbours (a shift per offset)
+        strides = np.cumprod((*self.shape[1:], 1)[::-1])[::-1]
+        K = index[a] + np.dot(offset, strides)
+        # Occupied neighbours
+        b = np.minimum(np.searchsorted(index, K), index.size - 1)
+        hit = index[b] == K
+        self.edges.append(np.vstack([a[hit], b[hit]]).T.astype(np.uint32))
@@ -0,0 +1,201 @@
+from concurrent.futures import Executor
+import numpy as np
+
+from source.utils.types import Array, F
+
+"""
+Generalized winding number of a triangle soup.
+
+The (signed) solid angle of every triangle seen from a point,
+summed over the mesh and divided by 4pi: ~1 inside, ~0 outside.
+Holes & small overlaps only move the value a bit, so it still
+separates inside from outside where ray parity breaks.
+
+Far away clusters of triangles are summed by a (2nd order)
+expansion about their center, only nearby leaves are exact.
+
+Resources:
+> Jacobson et al. 2013, Robust Inside-Outside Segmentation using Generalized Winding Numbers
+> Van Oosterom & Strackee 1983, The Solid Angle of a Plane Triangle
+> Barill et al. 2018, Fast Winding Numbers for Soups and Clouds
+"""
+
+# Triangles per leaf of the hierarchy
+LEAF = 32
+
+
+def winding(triangles: 'Array[F]', points: 'Array[F]', batch: int = 1 << 18, pool: Executor | None = None) -> 'Array[F]':
+    """ Winding numbers of points [Px3] w.r.t. triangles [Tx3x3]
+
+    Evaluated in chunks of points, about {batch} pairs each
+    (chunks run on {pool} if given).
+    """
+    T = triangles.astype(np.float32)
+    P = points.astype(np.float32)
+    W = np.zeros(P.shape[0], np.float64)
+    step = max(batch // max(T.shape[0], 1), 1)
+
+    def chunk(s: int):
+        W[s:s + step] = _solid_angles(T[None], P[s:s + step, None]).sum(axis=1, dtype=np.float64)
+
+    for _ in (pool.map if pool else map)(chunk, range(0, P.shape[0], step)):
+        pass
+    return W / (4.0 * np.pi)
+
+
+def inside(triangles: 'Array[F]', points: 'Array[F]', batch: int = 1 << 18, pool: Executor | None = None) -> 'Array[np.bool_]':
+    """ Points w/ a winding number above one half (either orientation) """
+    return np.abs(winding(triangles, points, batch, pool)) > 0.5
+
+
+class Winding:
+    """ Fast winding numbers of a triangle soup
+
+    Triangles are ordered along a Morton curve & split in
+    halves down to leaves of {leaf} triangles. A cluster
+    further than {beta} times its radius from a point counts
+    by its expansion, otherwise its halves are visited.
+    Build once, query many points (ie. span bisection).
+    """
+
+    def __init__(self, triangles: 'Array[F]', beta: float = 2.0, leaf: int = LEAF):
+        T = np.asarray(triangles, np.float64).reshape(-1, 3, 3)
+        n = T.shape[0]
+        self.beta = beta
+        # Levels (the last one are the leaves)
+        self.depth = max(int(np.ceil(np.log2(max(n, 1) / leaf))), 0)
+
+        # Spatially coherent order
+        centroid = T.mean(axis=1)
+        order = np.argsort(_morton(centroid), kind="stable")
+        T, centroid = T[order], centroid[order]
+
+        # Implicit tree (heap order): node k of level l covers [k n >> l, (k + 1) n >> l)
+        level = np.concatenate([np.full(1 << l, l) for l in range(self.depth + 1)])
+        k = np.arange(level.size) - ((1 << level) - 1)
+        start = (k * n) >> level
+        stop = ((k + 1) * n) >> level
+
+        # Area vectors & (area weighted) center of every node, by prefix sums
+        area = 0.5 * np.cross(T[:, 1] - T[:, 0], T[:, 2] - T[:, 0])
+        weight = np.linalg.norm(area, axis=1)
+        SA = _prefix(area)
+        SW = _prefix(weight)
+        SC = _prefix(centroid * weight[:, None])
+        SM = _prefix(centroid[:, :, None] * area[:, None, :])
+        self.dipole = SA[stop] - SA[start]
+        W = SW[stop] - SW[start]
+
+        # Bounding box of every node
+        low = _reduce(np.minimum, T.min(axis=1), start, stop)
+        high = _reduce(np.maximum, T.max(axis=1), start, stop)
+        mid = 0.5 * (low + high)
+        self.center = np.where(W[:, None] > 0, (SC[stop] - SC[start]) / np.maximum(W, 1E-300)[:, None], mid)
+        self.radius = np.linalg.norm(self.center - mid, axis=1) + 0.5 * np.linalg.norm(high - low, axis=1)
+        # Sum of (centroid - center) x area, per node
+        self.moment = SM[stop] - SM[start] - self.center[:, :, None] * self.dipole[:, None, :]
+
+        # Leaf triangles, padded w/ degenerate ones (no solid angle)
+        self.first = (1 << self.depth) - 1
+        size = stop[self.first:] - start[self.first:]
+        self.leaves = np.zeros((size.size, max(int(size.max(initial=0)), 1), 3, 3), np.float32)
+        slot = np.arange(n) - np.repeat(start[self.first:], size)
+        self.leaves[np.repeat(np.arange(size.size), size), slot] = T
+
+    def __call__(self, points: 'Array[F]', batch: int = 1 << 18, pool: Executor | None = None) -> 'Array[F]':
+        """ Winding numbers of points [Px3] (exact leaves in chunks of about {batch} pairs) """
+        P = np.asarray(points, np.float64).reshape(-1, 3)
+        W = np.zeros(P.shape[0], np.float64)
+
+        # Descend from the root: far nodes as dipoles, near leaves are exact
+        pi = np.arange(P.shape[0])
+        ni = np.zeros(P.shape[0], np.int64)
+        near: list[tuple['Array[I]', 'Array[I]']] = []
+        while pi.size:
+            D = self.center[ni] - P[pi]
+            r2 = np.einsum('ij,ij->i', D, D)
+            far = r2 > (self.beta * self.radius[ni]) ** 2
+            W += np.bincount(pi[far], self._expand(ni[far], D[far], r2[far]), minlength=W.size)
+            pi, ni = pi[~far], ni[~far]
+            leaf = ni >= self.first
+            near.append((pi[leaf], ni[leaf] - self.first))
+            # Both halves of the rest
+            pi = np.repeat(pi[~leaf], 2)
+            ni = 2 * np.repeat(ni[~leaf], 2) + np.tile([1, 2], pi.size // 2)
+
+        # Exact solid angles of the near leaves
+        pi = np.concatenate([p for p, _ in near])
+        li = np.concatenate([l for _, l in near])
+        Q = P.astype(np.float32)
+        step = max(batch // self.leaves.shape[1], 1)
+
+        def chunk(s: int):
+            L = self.leaves[li[s:s + step]]
+            return _solid_angles(L, Q[pi[s:s + step], None]).sum(axis=1, dtype=np.float64)
+
+        for s, angles in zip(range(0, pi.size, step), (pool.map if pool else map)(chunk, range(0, pi.size, step))):
+            W += np.bincount(pi[s:s + step], angles, minlength=W.size)
+        return W / (4.0 * np.pi)
+
+    def _expand(self, ni: 'Array[I]', D: 'Array[F]', r2: 'Array[F]') -> 'Array[F]':
+        # Solid angles of nodes (center - point = D): dipole & its gradient term
+        M = self.moment[ni]
+        r3 = r2 * np.sqrt(r2)
+        dipole = np.einsum('ij,ij->i', self.dipole[ni], D)
+        trace = np.trace(M, axis1=1, axis2=2)
+        quad = np.einsum('ij,ijk,ik->i', D, M, D)
+        return (dipole + trace - 3.0 * quad / r2) / r3
+
+    def inside(self, points: 'Array[F]', batch: int = 1 << 18, pool: Executor | None = None) -> 'Array[np.bool_]':
+        """ Points w/ a winding number above one half (either orientation) """
+        return np.abs(self(points, batch, pool)) > 0.5
+
+
+def _prefix(values: 'Array[F]') -> 'Array[F]':
+    # Sums of [0, i) by i
+    S = np.zeros((values.shape[0] + 1, *values.shape[1:]), np.float64)
+    np.cumsum(values, axis=0, out=S[1:])
+    return S
+
+
+def _reduce(ufunc, values: 'Array[F]', start: 'Array[I]', stop: 'Array[I]') -> 'Array[F]':
+    # Reduce the (non empty) ranges [start, stop) of values
+    pad = np.vstack([values, values[-1:]]) if values.size else np.zeros((1, values.shape[1]))
+    return ufunc.reduceat(pad, np.stack([start, stop], axis=1).ravel(), axis=0)[::2]
+
+
+def _morton(points: 'Array[F]') -> 'Array[np.uint64]':
+    # Interleaved bits of the (10 bit) quantized coordinates
+    low = points.min(axis=0, initial=np.inf) if points.size else np.zeros(3)
+    span = float(np.max(points.max(axis=0, initial=-np.inf) - low, initial=0.0)) if points.size else 0.0
+    Q = ((points - low) * (1023 / (span or 1.0))).astype(np.uint64)
+    code = np.zeros(points.shape[0], np.uint64)
+    for k in range(3):
+        x = Q[:, k] & np.uint64(0x3FF)
+        x = (x | (x << np.uint64(16))) & np.uint64(0x030000FF)
+        x = (x | (x << np.uint64(8))) & np.uint64(0x0300F00F)
+        x = (x | (x << np.uint64(4))) & np.uint64(0x030C30C3)
+        x = (x | (x << np.uint64(2))) & np.uint64(0x09249249)
+        code |= x << np.uint64(2 - k)
+    return code
+
+
+def _solid_angles(T: 'Array[F]', P: 'Array[F]') -> 'Array[F]':
+    # Corners relative to the points (per component, broadcast) [..., T]
+    A = [T[..., 0, k] - P[..., k] for k in range(3)]
+    B = [T[..., 1, k] - P[..., k] for k in range(3)]
+    C = [T[..., 2, k] - P[..., k] for k in range(3)]
+    a = np.sqrt(A[0] * A[0] + A[1] * A[1] + A[2] * A[2])
+    b = np.sqrt(B[0] * B[0] + B[1] * B[1] + B[2] * B[2])
+    c = np.sqrt(C[0] * C[0] + C[1] * C[1] + C[2] * C[2])
+
+    det = (
+        A[0] * (B[1] * C[2] - B[2] * C[1])
+        + A[1] * (B[2] * C[0] - B[0] * C[2])
+        + A[2] * (B[0] * C[1] - B[1] * C[0])
+    )
+    div = a * b * c
+    div += (A[0] * B[0] + A[1] * B[1] + A[2] * B[2]) * c
+    div += (B[0] * C[0] + B[1] * C[1] + B[2] * C[2]) * a
+    div += (C[0] * A[0] + C[1] * A[1] + C[2] * A[2]) * b
+    return 2.0 * np.arctan2(det, div)
@@ -95,11 +95,8 @@ class Config:
         # field transform
         # matrix = glm.translate(-glm.vec3(*B.start)) * self.matrix
 
-        # Compute field
-        grid = field.compute(ctx.shape, ctx.matrix, self.width)
-
-        # Bundle as data w/ correct offset
-        data = n.Data.FromMaterialGrid(self.material, grid)
+        # Compute field (inside its bounds only) as data
+        data = field.voxelize(self.material, ctx.shape, ctx.matrix, self.width, ctx.layout)
 
         # Bundle as node
         node = ctx.finalize(n.VoxelNode.Leaf(self.op, data))
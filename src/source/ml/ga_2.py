@@ -10,22 +10,31 @@ Genetic Algorithm
 
 """
 
+import os
 import glm
 import numpy as np
+import multiprocessing as mp
 from dataclasses import dataclass
 from datetime import datetime
+from itertools import product
 
 import source.ml.rng as r
 import source.math.fields as f
+import source.graphics.matrices as mat
 import source.data.voxels as v
 import source.data.material as m
 import source.math.voxels2truss as v2t
 import source.math.truss2stress as fem
+import source.math.solvers as sv
+import source.math.incremental as inc
 import source.data.voxel_tree.node as n
+import source.data.voxel_tree.lazy as lz
+import source.data.voxel_tree.shared as sh
 from source.loader.geometry import Context
 from source.utils.types import bool3, float3
 
 import source.ml.ga_storage as s
+from source.ml.ga_cache import FitnessCache
 
 
 @dataclass
@@ -39,6 +48,37 @@ class Genome:
         return [cls(glm.vec3(a), glm.vec3(b)) for a, b in zip(A, B)]
 
 
+@dataclass
+class WarmStart:
+    """Displacement field keyed by (global) voxel coordinate"""
+
+    keys: np.ndarray
+    values: np.ndarray
+
+    @staticmethod
+    def key(coords: np.ndarray) -> np.ndarray:
+        # Pack signed (x, y, z) into one sortable int64
+        return inc.lattice_key(coords)
+
+    @classmethod
+    def From(cls, coords: np.ndarray, D: np.ndarray):
+        K = cls.key(coords)
+        I = np.argsort(K)
+        return cls(K[I], D[I])
+
+    def lookup(self, coords: np.ndarray) -> np.ndarray:
+        """Guess the displacement per voxel (zero if unknown)"""
+        K = self.key(coords)
+        G = np.zeros((K.size, *self.values.shape[1:]), self.values.dtype)
+        if not self.keys.size:
+            return G
+        P = np.searchsorted(self.keys, K)
+        np.minimum(P, self.keys.size - 1, out=P)
+        hit = self.keys[P] == K
+        G[hit] = self.values[P[hit]]
+        return G
+
+
 class GenomeStorage(s.Storage[Genome]):
     def serialize(self, genome: Genome) -> s.Data:
         return [*genome.a, *genome.b]
@@ -50,6 +90,17 @@ class GenomeStorage(s.Storage[Genome]):
 
 Storage = GenomeStorage()
 
+# Fitness combination across load cases
+AGGREGATE = {
+    'max': np.max,
+    'mean': np.mean,
+    'sum': np.sum,
+}
+
+
+# Rod operations that may add voxels outside the base
+ADDING = (n.Operation.OVERWRITE, n.Operation.OUTSIDE)
+
 
 def open_db(folder: str):
     """Open the Database w/ this GenomeStorage"""
@@ -80,12 +131,22 @@ class Config:
     # input voxels
     node: n.VoxelNode
 
+    # storage layout of new voxel data (rods, also in workers)
+    layout: n.Layout
+
     # physics constraints
     forces: dict[m.Material, float3]
     statics: dict[m.Material, bool3]
 
+    # extra load cases & how to combine their fitness
+    loads: dict[str, dict[m.Material, float3]]
+    aggregate: str
+
     # setup
     seed: int | None
+    solver: str | None
+    workers: int
+    cache: int
     size: int
     keep: int
     mutations: int
@@ -101,64 +162,180 @@ class Config:
         # Make sure mutations is inside valid range
         self.mutations = max(self.mutations, 0)
 
+        # Make sure aggregate is known
+        assert self.aggregate in AGGREGATE, f"Unknown aggregate: {self.aggregate}"
+
+        # Solver backend (the base structure is shared by all induviduals)
+        self.session = sv.get(self.solver)
+
+        # Base voxels published to shared memory (for workers)
+        self.shared: sh.SharedData | None = None
+
+        # Fitness per rod voxels (byte budget, 0 disables)
+        # NOTE: only the main process memoizes, workers solve what it sends
+        self.memo = FitnessCache(self.cache)
+
+        # Base structure assembly (built on first use)
+        self.incremental: inc.Incremental | None = None
+
+        # Base structure assembly published to shared memory (for workers)
+        self.assembly: sh.SharedObject | None = None
+
+        # Evaluated base w/ a rod slot (built on first use)
+        self.tree: lz.LazyNode | None = None
+
+    def __getstate__(self):
+        # The solver backend & base assembly are process local
+        state = self.__dict__.copy()
+        state.pop("session", None)
+        state["incremental"] = None
+        state["tree"] = None
+        # Workers don't memoize (the main process keeps the one cache)
+        state["memo"] = FitnessCache(0)
+        # Ship the base voxels by shared memory name
+        if self.shared is not None:
+            state["node"] = n.VoxelNode(self.node.op, n.Data.Empty(n.Box.Empty()))
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.session = sv.get(self.solver)
+        # Attach to the published base voxels
+        if self.shared is not None:
+            self.node = n.VoxelNode(self.node.op, self.shared.attach())
+
     def seedPopulation(self, rng):
         print("[config] creating a population of size", self.size)
         P = s.Induvidual.package(Genome.random(rng, self.size))
         return s.Generation(P, 0)
 
-    def presentInduvidual(self, genome: Genome):
-        # Create Cylinder field
+    def rods(self, genomes: list[Genome]) -> list[n.VoxelNode]:
+        """Voxelize the rods of genomes (one batched field)"""
+        if not genomes:
+            return []
+
+        # Create Cylinder field (endpoints as (3, K))
         field = f.Cylinder(
-            self.mat_a * genome.a,
-            self.mat_b * genome.b,
+            np.array([tuple(self.mat_a * g.a) for g in genomes]).T,
+            np.array([tuple(self.mat_b * g.b) for g in genomes]).T,
         )
 
         # field region
         ctx = self.ctx
 
-        # Compute field
-        grid = field.compute(ctx.shape, ctx.matrix, self.width)
-
-        # Bundle as data w/ correct offset
-        data = n.Data.FromMaterialGrid(self.material, grid)
-
-        # Bundle as node
-        node = ctx.finalize(n.VoxelNode.Leaf(self.op, data))
-
-        # Join with computed node
-        return n.VoxelNode.process([self.node, node])
-
-    def createPhenotype(self, genome: Genome):
+        # Compute fields (inside their bounds only) as data
+        datas = field.voxelize_all(self.material, ctx.shape, ctx.matrix, self.width, self.layout)
+
+        # Bundle as nodes
+        return [ctx.finalize(n.VoxelNode.Leaf(self.op, data)) for data in datas]
+
+    def presentInduvidual(self, genome: Genome, rod: n.VoxelNode | None = None):
+        if rod is None:
+            [rod] = self.rods([genome])
+
+        # Join with computed node (only the rod region is recomputed)
+        return self.join(rod)
+
+    def base(self) -> n.Data:
+        """The base voxels alone (the node data itself when overwritten onto nothing)"""
+        data = self.node.data if self.shared is None else self.shared.attach()
+        if self.node.op == n.Operation.OVERWRITE:
+            return data
+        return n.VoxelNode.process([n.VoxelNode(self.node.op, data)])
+
+    def join(self, node: n.VoxelNode):
+        if self.tree is None:
+            slot = lz.LazyNode.From(n.VoxelNode.Empty())
+            self.tree = lz.LazyNode.Parent(self.node.op, [lz.LazyNode.From(self.node), slot])
+            if self.node.op == n.Operation.OVERWRITE:
+                # No private render (a view of the shared base)
+                self.tree.adopt(self.base())
+            else:
+                self.tree.evaluate()
+        return self.tree.replace(1, lz.LazyNode.From(node)).evaluate()
+
+    def createPhenotype(self, genome: Genome, rod: n.VoxelNode | None = None):
         # creation & presentation uses same code
-        data = self.presentInduvidual(genome)
+        return self.voxelize(self.presentInduvidual(genome, rod))
 
+    def voxelize(self, data: n.Data):
         # build voxels
         voxels = v.Voxels(data.material.shape)
 
         # Set internals
         voxels.grid = data.material
         voxels.strength = data.strength
+        voxels.offset = tuple(data.box.start)
         voxels.forces = self.forces
         voxels.statics = self.statics
+        voxels.loads = self.loads
 
         # done
         return voxels
 
-    def evaluate(self, phenome: v.Voxels):
-        # TODO: multiprocess this function
-        # it's the easiest way to speedup the search
-
-        # build truss
-        truss = v2t.voxels2truss(phenome)
+    def region(self) -> n.Box:
+        """Voxels a rod may fill (any endpoints in both volumes)"""
+        # Endpoint volumes (unit balls) & the rod width, in field space
+        corners = []
+        for M in (self.mat_a, self.mat_b):
+            T = mat.to_affine(M)
+            r = np.linalg.norm(T[:, :3], axis=1)
+            corners += [T[:, 3] - r, T[:, 3] + r]
+        low = np.min(corners, axis=0) - self.width
+        high = np.max(corners, axis=0) + self.width
+
+        # To (clipped) voxels of the context, as in Field.regions
+        T = mat.to_affine(self.ctx.matrix)
+        C = np.array(list(product(*zip(low, high))))
+        P = C @ T[:, :3].T + T[:, 3]
+        shape = np.array(self.ctx.shape, np.int64)
+        start = np.clip(np.floor(P.min(axis=0)).astype(np.int64), 0, shape)
+        stop = np.clip(np.ceil(P.max(axis=0)).astype(np.int64) + 1, 0, shape)
+        return n.Box(start, stop).offset(self.ctx.box.start)
+
+    def base_assembly(self) -> inc.Incremental:
+        """Base structure assembly (built on first use, or attached when published)"""
+        if self.incremental is None:
+            if self.assembly is not None:
+                self.incremental = self.assembly.attach()
+            else:
+                # Rods stay inside the region: one matrix pattern for all
+                # (only some operations may add voxels outside the base)
+                region = self.region() if self.op in ADDING else None
+                self.incremental = inc.Incremental(self.voxelize(self.base()), region=region)
+        return self.incremental
+
+    def assemble(self, phenome: v.Voxels):
+        """Truss & stiffness matrix (updated from the base structure if possible)"""
+        if result := self.base_assembly().update(phenome):
+            return result
+
+        # Too many changes, rebuild
+        return v2t.voxels2truss(phenome), None
+
+    def evaluate(self, phenome: v.Voxels, induvidual: s.Induvidual[Genome] | None = None):
+        # build truss (& stiffness matrix)
+        truss, matrix = self.assemble(phenome)
+
+        # voxel coordinates of the truss nodes
+        coords = np.floor(truss.nodes).astype(np.int64) + phenome.offset
+
+        # warm start from the lineage (only iterative solvers use it)
+        warm: WarmStart | None = induvidual and induvidual.cache
+        guess = np.moveaxis(warm.lookup(coords), 1, 0) if warm and self.session.WARM else None
 
         try:
-            # sinmulate [todo: multiprocess this]
-            # {deformation, edge-compression}
-            D, E = fem.fem_simulate(truss)
+            # sinmulate
+            # {deformation, edge-compression} per load case
+            D, E = fem.fem_simulate_loads(truss, solver=self.session, guess=guess, matrix=matrix)
         except Exception as e:
             print(e)
             return 1e10
 
+        # pass displacements down the lineage
+        if induvidual and D is not None and self.session.WARM:
+            induvidual.cache = WarmStart.From(coords, np.moveaxis(D, 0, 1))
+
         # No Solution
         if E is None:
             return 1e10
@@ -167,12 +344,12 @@ class Config:
         if not np.isfinite(E).all():  # type: ignore
             return 1e10
 
-        # get min-max of compression
-        max = E.max()
-        min = E.min()
+        # get min-max of compression (per load case)
+        max = E.max(axis=1)
+        min = E.min(axis=1)
 
         # get mean of stress
-        mean = abs(E).mean()
+        mean = abs(E).mean(axis=1)
 
         # print(" max:", max)
         # print(" min:", min)
@@ -183,8 +360,11 @@ class Config:
         # lower is better
         fitness = abs(max) + abs(min) + mean
 
+        # combine load cases
+        fitness = AGGREGATE[self.aggregate](fitness)
+
         # done
-        return fitness
+        return float(fitness)
 
     def selectPopulation(self, rng, generation: s.Generation[Genome]):
         # fourths + rest
@@ -203,11 +383,12 @@ class Config:
         # rest
         rest = s.Induvidual.package(Genome.random(rng, rest))
 
-        # crossover
+        # crossover (lineage follows the first parent)
         def crossover(A: list[s.Induvidual[Genome]], B: list[s.Induvidual[Genome]]):
-            return s.Induvidual.package(
-                Genome(a.genome.a, b.genome.b) for a, b in zip(A, B, strict=True)
-            )
+            return [
+                s.Induvidual(Genome(a.genome.a, b.genome.b), 0, False, a.cache)
+                for a, b in zip(A, B, strict=True)
+            ]
 
         # build population w/ crossover
         return s.Generation(
@@ -262,12 +443,90 @@ class Config:
         return self.folder.format(now=datetime.now())
 
 
+# Thread pools to limit inside worker processes
+THREADS = ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"]
+
+# Worker process configuration (shipped once by the pool initializer)
+__worker__: Config | None = None
+
+
+def _init_worker(config: Config):
+    global __worker__
+    __worker__ = config
+
+
+# (index, genome, lineage warm start [iterative solvers only])
+Task = tuple[int, s.Data, WarmStart | None]
+
+
+def _evaluate_worker(task: Task):
+    # genome out (rebuilt here), fitness & solver counters back
+    index, data, warm = task
+    C = __worker__
+    assert C is not None, "Worker was not initialized"
+    I = s.Induvidual(Storage.deserialize(data), 0, False, warm)
+    before = C.session.counters()
+    fitness = C.evaluate(C.createPhenotype(I.genome), I)
+    return index, fitness, I.cache, C.session.since(before)
+
+
+def open_pool(C: Config):
+    """Process pool w/ the configuration (base voxels) shipped once per worker"""
+    if C.workers <= 1:
+        return None
+
+    print(f"[config] starting {C.workers} workers")
+
+    # Publish the base voxels once (workers attach by name)
+    C.shared = sh.SharedData.Publish(C.node.data)
+
+    # Build the base assembly once, around the shared voxels
+    # (workers attach to its arrays, the main process doesn't solve)
+    C.incremental = None
+    C.assembly = sh.SharedObject.Publish(C.base_assembly())
+    C.incremental = None
+
+    # Avoid (processes x threads) oversubscription
+    env = {k: os.environ.get(k) for k in THREADS}
+    os.environ.update({k: "1" for k in THREADS})
+    try:
+        ctx = mp.get_context("spawn")
+        return ctx.Pool(C.workers, _init_worker, (C,))
+    finally:
+        for k, v in env.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
 class GA:
     def __init__(self, config: Config):
         self.running = False
+        self.pool = None
         self.reset(config)
 
+    def close(self):
+        """Stop the worker processes"""
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+        # Free the published base voxels
+        if C := getattr(self, "config", None):
+            # Drop the views of the blocks first (built again on use)
+            if C.shared is not None or C.assembly is not None:
+                C.tree = None
+                C.incremental = None
+            if C.shared is not None:
+                C.shared.release()
+                C.shared = None
+            if C.assembly is not None:
+                C.assembly.release()
+                C.assembly = None
+
     def reset(self, C: Config):
+        self.close()
+        self.pool = open_pool(C)
         self.db = open_db(C.getFolder())
         self.rng = np.random.default_rng(C.seed)
         self.config = C
@@ -291,6 +550,56 @@ class GA:
         # force full re-evaluation
         self.generation.invalidate()
 
+    def evaluate(self, induviduals: list[s.Induvidual[Genome]]):
+        """Compute the fitness of induviduals (serial or w/ the pool)"""
+        C = self.config
+        hits = 0
+
+        # Memo keys by rod voxels (one batched field, no phenotypes)
+        rods = C.rods([I.genome for I in induviduals])
+        keys = [FitnessCache.key(rod.data) for rod in rods]
+        solve: dict[bytes, list[int]] = {}
+        for k, (I, key) in enumerate(zip(induviduals, keys)):
+            if (fitness := C.memo.get(key)) is not None:
+                I.fitness = fitness
+                hits += 1
+            elif key in solve:
+                # Same rod twice in this batch, solved once
+                solve[key].append(k)
+                hits += 1
+            else:
+                solve[key] = [k]
+
+        # Unique misses only
+        for k, fitness, warm in self.results([K[0] for K in solve.values()], induviduals, rods):
+            C.memo.put(keys[k], fitness)
+            for j in solve[keys[k]]:
+                induviduals[j].fitness = fitness
+            induviduals[k].cache = warm
+        return hits
+
+    def results(self, K: list[int], induviduals: list[s.Induvidual[Genome]], rods: list[n.VoxelNode]):
+        """(index, fitness, warm start) of induviduals {K}, in any order"""
+        C = self.config
+
+        # Serial (w/ the batched rods)
+        if self.pool is None:
+            for k in K:
+                I = induviduals[k]
+                yield k, C.evaluate(C.createPhenotype(I.genome, rods[k]), I), I.cache
+            return
+
+        # Dynamic scheduling, one genome per task
+        # Lineage warm starts are shipped only if the solver uses them
+        def task(k: int) -> Task:
+            I = induviduals[k]
+            return k, Storage.serialize(I.genome), I.cache if C.session.WARM else None
+
+        # Worker solver counters are added up in the main process
+        for k, fitness, warm, counters in self.pool.imap_unordered(_evaluate_worker, [task(k) for k in K], chunksize=1):
+            C.session.merge(counters)
+            yield k, fitness, warm
+
     def current(self):
         if best := self.best:
             return self.config.presentInduvidual(best.genome)
@@ -308,18 +617,20 @@ class GA:
 
         print(f"\n[generation-{G.index}] running:")
 
+        # Evaluate genomes
+        pending = [I for I in G.population if not I.validated]
+        hits = self.evaluate(pending)
+
         # Iterate genomes
         for i, I in enumerate(G.population):
-            if not I.validated:
-                # Realize induvidual
-                phenotype = C.createPhenotype(I.genome)
-                # Evaluate induvidual (fitness-function)
-                I.fitness = C.evaluate(phenotype)
-
             op = "cached" if I.validated else "result"
             print(f"[genome-{i}] {op}: {I.fitness:6.3f}")
             I.validated = True
 
+        print(f"[cache] hits: {hits} misses: {len(pending) - hits}")
+
+        print(f"[solver] {C.session.stats()}")
+
         # order population
         G = G.sorted()
 
@@ -0,0 +1,57 @@
+from collections import OrderedDict
+import hashlib
+
+import numpy as np
+
+from source.data.voxel_tree.data import Data
+
+
+class FitnessCache:
+    """LRU cache of fitness per phenotype, bounded by a byte budget"""
+
+    # Estimated bookkeeping bytes per entry (besides the key)
+    ENTRY = 96
+
+    def __init__(self, budget: int):
+        self.budget = max(budget, 0)
+        self.entries = OrderedDict[bytes, float]()
+        self.bytes = 0
+
+    @staticmethod
+    def key(data: Data) -> bytes:
+        """Hash of cropped voxel data: box & materials
+
+        A fixed base joined w/ equal rods gives equal phenotypes,
+        so the (small) rod data is enough to key a phenotype.
+        """
+        grid = np.ascontiguousarray(data.material)
+        H = hashlib.blake2b(digest_size=20)
+        H.update(np.asarray(data.box.start, np.int64).tobytes())
+        H.update(np.asarray(data.box.stop, np.int64).tobytes())
+        H.update(grid.dtype.str.encode())
+        H.update(memoryview(grid).cast("B"))
+        return H.digest()
+
+    def cost(self, key: bytes):
+        return len(key) + self.ENTRY
+
+    def get(self, key: bytes):
+        """Lookup a fitness (None on a miss)"""
+        if key not in self.entries:
+            return None
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key: bytes, fitness: float):
+        """Store a fitness, evicting the least recently used"""
+        cost = self.cost(key)
+        if cost > self.budget:
+            return
+        if key in self.entries:
+            self.entries.move_to_end(key)
+        else:
+            self.bytes += cost
+        self.entries[key] = fitness
+        while self.bytes > self.budget:
+            old, _ = self.entries.popitem(last=False)
+            self.bytes -= self.cost(old)
@@ -1,5 +1,5 @@
 from typing import Generic, TypeVar, Protocol, Any, Iterable
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import numpy as np
 import glm
 import os
@@ -26,6 +26,8 @@ class Induvidual(Generic[T]):
     genome: T
     fitness: float
     validated: bool
+    # Runtime state passed down the lineage (not serialized)
+    cache: Any = field(default=None, repr=False, compare=False)
 
     @classmethod
     def new(cls, genome: T):
@@ -1,6 +1,10 @@
+import os
+import uuid
+import zlib
 import numpy as np
 
 from source.data.mesh import Geometry, Mesh
+from source.utils import voxel_cache as vc
 from pywavefront import (  # type: ignore
     wavefront as w,
     mesh as m,
@@ -9,12 +13,93 @@ from pywavefront import (  # type: ignore
 
 __cache__ = dict[str, Mesh]()
 
+# Binary mesh: header, float32 vertices [Nx3], uint32 indices [M]
+BINARY = '.bin'
+MAGIC = b'MESH'
+VERSION = 1
+HEADER = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<u4'),
+    ('vertices', '<u8'),
+    ('indices', '<u8'),
+    ('checksum', '<u4'),
+    ('pad', '<u4'),
+])
+
 def cacheMesh(file: str):
-    """ Load or get Cached mesh """
+    """ Load or get Cached mesh (binary file when up to date) """
     if file not in __cache__:
-        __cache__[file] = loadMesh(file)
+        __cache__[file] = loadCached(file)
     return __cache__[file]
 
+def binaryPath(file: str, folder: str = vc.FOLDER):
+    """ Binary file of {file} in the cache folder (keyed by content) """
+    return os.path.join(folder, vc.digest(file).hex() + BINARY)
+
+def loadCached(file: str, folder: str = vc.FOLDER):
+    """ Load the cached binary of {file}, convert it if missing """
+    binary = binaryPath(file, folder)
+    try:
+        return readBinary(binary)
+    except (OSError, ValueError):
+        pass
+    mesh = loadMesh(file)
+    try:
+        writeBinary(binary, mesh)
+    except OSError:
+        # Read only location, parse again next time
+        pass
+    return mesh
+
+def convert(file: str, folder: str = vc.FOLDER):
+    """ Preprocess a mesh file into the binary format """
+    binary = binaryPath(file, folder)
+    writeBinary(binary, loadMesh(file))
+    return binary
+
+def writeBinary(file: str, mesh: Mesh):
+    """ Write a mesh (atomically) as header & raw arrays """
+    V = np.ascontiguousarray(mesh.vertices, '<f4').reshape(-1, 3)
+    I = np.ascontiguousarray(mesh.indices, '<u4').reshape(-1)
+    H = np.zeros((), HEADER)
+    H['magic'] = MAGIC
+    H['version'] = VERSION
+    H['vertices'] = V.shape[0]
+    H['indices'] = I.size
+    H['checksum'] = zlib.crc32(I, zlib.crc32(V))
+
+    os.makedirs(os.path.dirname(file) or '.', exist_ok=True)
+    tmp = f"{file}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(H.tobytes())
+            f.write(V.tobytes())
+            f.write(I.tobytes())
+        os.replace(tmp, file)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def readBinary(file: str):
+    """ Map a binary mesh (read only), checked against its header """
+    M = np.memmap(file, np.uint8, 'r')
+    if M.size < HEADER.itemsize:
+        raise ValueError(f"Truncated mesh file: \"{file}\"")
+    H = M[:HEADER.itemsize].view(HEADER)[0]
+    if H['magic'] != MAGIC or H['version'] != VERSION:
+        raise ValueError(f"Not a mesh file (v{VERSION}): \"{file}\"")
+
+    nv, ni = int(H['vertices']), int(H['indices'])
+    a = HEADER.itemsize
+    b = a + nv * 3 * 4
+    if M.size != b + ni * 4:
+        raise ValueError(f"Truncated mesh file: \"{file}\"")
+    V = M[a:b].view('<f4').reshape(nv, 3)
+    I = M[b:].view('<u4')
+    if zlib.crc32(I, zlib.crc32(V)) != H['checksum']:
+        raise ValueError(f"Corrupt mesh file: \"{file}\"")
+    return Mesh(V, I, Geometry.Triangles)
+
 def loadMesh(file: str, cache: bool = False):
     """ Only load the first mesh """
     return next(yieldMeshes(file, cache))
@@ -56,3 +141,10 @@ def getVertices(m: l.Material) -> 'np.ndarray[np.float32]':
 
     # Cut out everything except position
     return vertices[:, -3:]
+
+
+if __name__ == '__main__':
+    import sys
+
+    for file in sys.argv[1:]:
+        print(convert(file))
@@ -0,0 +1,116 @@
+import hashlib
+import os
+import uuid
+
+import glm
+import numpy as np
+
+import source.graphics.matrices as mat
+from source.utils.types import Array, B, int3
+
+# Default location & size of the cache (override w/ the environment)
+FOLDER = os.environ.get(
+    "VOXEL_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "source", "voxels"),
+)
+BUDGET = int(os.environ.get("VOXEL_CACHE_BYTES", 256 << 20))
+
+__digests__ = dict[tuple[str, int, int], bytes]()
+
+
+def digest(file: str) -> bytes:
+    """ Hash of a file's content (memoized by path, size & mtime) """
+    S = os.stat(file)
+    K = (os.path.abspath(file), S.st_size, S.st_mtime_ns)
+    if K not in __digests__:
+        H = hashlib.blake2b(digest_size=20)
+        with open(file, "rb") as f:
+            while chunk := f.read(1 << 20):
+                H.update(chunk)
+        __digests__[K] = H.digest()
+    return __digests__[K]
+
+
+class VoxelCache:
+    """ On disk cache of voxel grids, content addressed
+
+    Grids are stored cropped to their content as compressed
+    .npz files, the least recently used files are evicted
+    once the folder grows beyond {budget} bytes.
+    """
+
+    def __init__(self, folder: str = FOLDER, budget: int = BUDGET):
+        self.folder = folder
+        self.budget = max(budget, 0)
+
+    @staticmethod
+    def key(file: str, matrix: glm.mat4, shape: int3, *extra: object) -> str:
+        """ Key of a voxelized file: content, transform, shape & {extra} """
+        H = hashlib.blake2b(digest_size=20)
+        H.update(digest(file))
+        H.update(np.asarray(mat.to_affine(matrix), np.float64).tobytes())
+        H.update(np.asarray(shape, np.int64).tobytes())
+        H.update(repr(extra).encode())
+        return H.hexdigest()
+
+    def path(self, key: str):
+        return os.path.join(self.folder, key + ".npz")
+
+    def get(self, key: str, shape: int3) -> 'Array[B] | None':
+        """ Lookup a grid of {shape} (None on a miss) """
+        path = self.path(key)
+        try:
+            with np.load(path) as F:
+                start, mask = F["start"], F["mask"]
+            # Mark as recently used
+            os.utime(path)
+        except (OSError, KeyError, ValueError):
+            return None
+        grid = np.zeros(shape, np.bool_)
+        grid[tuple(slice(s, s + n) for s, n in zip(start, mask.shape))] = mask
+        return grid
+
+    def put(self, key: str, grid: 'Array[B]'):
+        """ Store a grid (cropped), evicting the least recently used """
+        if not self.budget:
+            return
+        # Crop to the content
+        N = np.argwhere(grid)
+        start = N.min(axis=0) if N.size else np.zeros(grid.ndim, np.int64)
+        stop = N.max(axis=0) + 1 if N.size else start
+        mask = grid[tuple(slice(s, e) for s, e in zip(start, stop))]
+
+        # Write & rename (readers never see a partial file)
+        os.makedirs(self.folder, exist_ok=True)
+        tmp = os.path.join(self.folder, f".{uuid.uuid4().hex}.tmp.npz")
+        try:
+            np.savez_compressed(tmp, start=start, mask=mask)
+            os.replace(tmp, self.path(key))
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self.evict()
+
+    def evict(self):
+        """ Remove the least recently used files beyond the budget """
+        files: list[tuple[float, int, str]] = []
+        for name in os.listdir(self.folder):
+            if name.startswith(".") or not name.endswith(".npz"):
+                continue
+            path = os.path.join(self.folder, name)
+            try:
+                S = os.stat(path)
+            except OSError:
+                continue
+            files.append((S.st_mtime, S.st_size, path))
+
+        size = sum(s for _, s, _ in files)
+        for _, s, path in sorted(files):
+            if size <= self.budget:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            size -= s
@@ -0,0 +1,89 @@
+import __init__
+import tracemalloc
+from timeit import default_timer as tick
+
+import numpy as np
+from source.data.voxel_tree.box import Box
+from source.data.voxel_tree.data import Data
+from source.data.voxel_tree.impl import impl
+from source.data.voxel_tree.node import VoxelNode
+from source.data.voxel_tree.operation import Operation
+
+
+def copy_apply(op: Operation, parent: Data, child: Data):
+    """ Reference kernels (gather, zero & scatter) """
+    B = Box.Intersection([parent.box, child.box])
+    if op in (Operation.CUTOUT, Operation.INTERSECT):
+        M = child[B].mask
+        if op == Operation.CUTOUT:
+            M = ~M
+        D = [a[M] for a in parent[B].arrays()]
+        for a in parent.arrays():
+            a[...] = 0
+        for a, d in zip(parent[B].arrays(), D):
+            a[M] = d
+        return
+    P = parent[B]
+    C = child[B]
+    M = impl.get(op).where(P, C)
+    for p, c in zip(P.arrays(), C.arrays()):
+        p[M] = c[M]
+
+
+def blob(rng, offset, shape, material: int):
+    D = Data.Empty(Box.OffsetShape(offset, shape))
+    D.mask[...] = rng.random(shape) < 0.5
+    D.material[D.mask] = material
+    D.strength[D.mask] = material * 10.0
+    return D
+
+
+def measure(fn, *args):
+    """ (seconds, peak allocated bytes) of a call """
+    tracemalloc.start()
+    start = tick()
+    fn(*args)
+    time = tick() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return time, peak
+
+
+def bench_operations(size: int = 160):
+    rng = np.random.default_rng(0)
+    base = blob(rng, (0, 0, 0), (size,) * 3, 1)
+    child = blob(rng, (size // 4,) * 3, (size // 2,) * 3, 2)
+
+    print(f"[impl] parent {size}^3, child {size // 2}^3")
+    for op in Operation:
+        A = Data(base.box, *(a.copy() for a in base.arrays()))
+        B = Data(base.box, *(a.copy() for a in base.arrays()))
+        t0, m0 = measure(copy_apply, op, A, child)
+        t1, m1 = measure(impl.get(op).apply, B, child)
+        same = all(np.array_equal(a, b) for a, b in zip(A.arrays(), B.arrays()))
+        print(
+            f"{op.name:>10}: copy {t0 * 1E3:7.1f}ms {m0 / 2**20:7.1f}MiB"
+            f" | in-place {t1 * 1E3:7.1f}ms {m1 / 2**20:7.1f}MiB | equal: {same}"
+        )
+
+
+def bench_process(size: int = 96, count: int = 20):
+    """ GA like: the same base joined w/ a new rod per individual """
+    rng = np.random.default_rng(1)
+    base = VoxelNode.Leaf(Operation.OVERWRITE, blob(rng, (0, 0, 0), (size,) * 3, 1))
+    rods = [
+        VoxelNode.Leaf(Operation.INSIDE, blob(rng, tuple(rng.integers(0, size // 2, 3)), (size // 3,) * 3, 2))
+        for _ in range(count)
+    ]
+
+    def run():
+        for rod in rods:
+            VoxelNode.process([base, rod])
+
+    t, m = measure(run)
+    print(f"[process] {count} x {size}^3: {t * 1E3:7.1f}ms peak {m / 2**20:7.1f}MiB")
+
+
+if __name__ == "__main__":
+    bench_operations()
+    bench_process()
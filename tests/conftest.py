@@ -0,0 +1,108 @@
+import glm
+import numpy as np
+import pytest
+
+from source.data.material import Material
+from source.data.voxel_tree.box import Box
+from source.data.voxel_tree.data import Data, Layout
+from source.data.voxel_tree.node import VoxelNode
+from source.data.voxel_tree.operation import Operation
+from source.loader.geometry import Context
+
+# Scripts (run them directly, they are not pytest modules)
+collect_ignore = ["gl_test.py", "test_truss.py", "test_multi.py"]
+
+BONE = Material(1, "BONE", None, 5.0)  # type: ignore
+STATIC = Material(2, "STATIC", None, 5.0)  # type: ignore
+FORCE = Material(3, "FORCE", None, 5.0)  # type: ignore
+METAL = Material(4, "METAL", None, 15.0)  # type: ignore
+
+
+def column(size: int, hollow: bool = False):
+    """ Upright bone column: static at the bottom, pushed down at the top """
+    x, y, z = np.indices((size,) * 3)
+    c = (size - 1) / 2
+    r = np.hypot(x - c, y - c)
+    inside = r < size * 0.45
+    if hollow:
+        inside &= r > size * 0.25
+    material = np.zeros((size,) * 3, np.uint32)
+    material[inside] = BONE.id
+    material[inside & (z == 0)] = STATIC.id
+    material[inside & (z == size - 1)] = FORCE.id
+    strength = np.where(inside, BONE.strenght, 0.0)
+    box = Box.OffsetShape((0, 0, 0), (size,) * 3)
+    return VoxelNode.Leaf(Operation.OVERWRITE, Data(box, inside, material, strength))
+
+
+@pytest.fixture
+def blob():
+    """ Leaf factory: random voxels of one material in a box """
+
+    def make(rng, start, shape, material: Material = BONE, op: Operation = Operation.OVERWRITE):
+        mask = rng.random(shape) < 0.4
+        data = Data(
+            Box.OffsetShape(start, shape),
+            mask,
+            np.where(mask, material.id, 0).astype(np.uint32),
+            np.where(mask, material.strenght, 0.0),
+        )
+        return VoxelNode.Leaf(op, data)
+
+    return make
+
+
+@pytest.fixture
+def column_voxels():
+    """ Voxels factory: the column w/ its forces & statics """
+    from source.data.voxels import Voxels
+
+    def make(size: int = 8, hollow: bool = False):
+        data = column(size, hollow).data
+        V = Voxels(data.material.shape)
+        V.grid = data.material
+        V.strength = data.strength
+        V.offset = tuple(data.box.start)
+        V.forces = {FORCE: (0.0, 0.0, -10.0)}
+        V.statics = {STATIC: (True, True, True)}
+        V.loads = {}
+        return V
+
+    return make
+
+
+@pytest.fixture
+def ga_config(tmp_path):
+    """ GA configuration factory: rods from the bottom to the top of a column """
+    import source.ml.ga_2 as ga
+
+    def make(size: int = 12, op: Operation = Operation.OVERWRITE, hollow: bool = False, **kwargs):
+        c = (size - 1) / 2
+        # Endpoint volumes: discs at the bottom & the top
+        disc = glm.scale(glm.vec3(size * 0.2, size * 0.2, 1.0))
+        options = dict(
+            ctx=Context(Box.OffsetShape((0, 0, 0), (size,) * 3)).push(glm.translate(glm.vec3(c, c, c))),
+            width=1.0,
+            mat_a=glm.translate(glm.vec3(0, 0, -c)) * disc,
+            mat_b=glm.translate(glm.vec3(0, 0, c)) * disc,
+            material=METAL,
+            op=op,
+            node=column(size, hollow),
+            layout=Layout(),
+            forces={FORCE: (0.0, 0.0, -10.0)},
+            statics={STATIC: (True, True, True)},
+            loads={},
+            aggregate='max',
+            seed=0,
+            solver=None,
+            workers=0,
+            cache=0,
+            size=8,
+            keep=2,
+            mutations=2,
+            folder=str(tmp_path / "ga"),
+        )
+        options.update(kwargs)
+        return ga.Config(**options)
+
+    return make
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from source.data.voxel_tree.bricks import BRICK, BrickCache
+from source.data.voxel_tree.node import VoxelNode
+from source.data.voxel_tree.operation import Operation
+
+from .conftest import METAL
+
+
+def same(A, B):
+    assert A.box == B.box
+    for a, b in zip(A.arrays(), B.arrays()):
+        assert np.array_equal(a, b)
+
+
+@pytest.mark.parametrize("op", list(Operation))
+def test_compose_matches_process(blob, op):
+    """ Brick by brick (across brick borders) equals one pass """
+    rng = np.random.default_rng(7)
+    nodes = [
+        blob(rng, (-5, 3, 20), (40, 30, 20)),
+        blob(rng, (20, 10, 28), (30, 8, 12), METAL, op),
+    ]
+    cache = BrickCache()
+    same(VoxelNode.process(nodes, cache), VoxelNode.process(nodes))
+    assert cache.hits == 0 and cache.misses > 0
+
+
+def test_unchanged_bricks_reused(blob):
+    rng = np.random.default_rng(8)
+    base = blob(rng, (0, 0, 0), (2 * BRICK, BRICK, BRICK))
+    cache = BrickCache()
+    VoxelNode.process([base, blob(rng, (2, 2, 2), (4, 4, 4), METAL)], cache)
+    misses = cache.misses
+    # The child moved inside the first brick, the second is unchanged
+    rod = blob(rng, (9, 9, 9), (4, 4, 4), METAL)
+    D = VoxelNode.process([base, rod], cache)
+    assert cache.hits == 1
+    assert cache.misses == misses + 1
+    same(D, VoxelNode.process([base, rod]))
+
+
+def test_budget(blob):
+    rng = np.random.default_rng(9)
+    nodes = [blob(rng, (0, 0, 0), (3 * BRICK, BRICK, BRICK))]
+    cache = BrickCache(budget=1)
+    VoxelNode.process(nodes, cache)
+    assert cache.bytes <= 1 and not cache.entries
+
+
+@pytest.mark.parametrize("op", [Operation.CUTOUT, Operation.INTERSECT])
+def test_reused_bricks_cropped(blob, op):
+    """ Hits copy only the content of the packed brick (empty ones none) """
+    rng = np.random.default_rng(10)
+    nodes = [
+        blob(rng, (0, 0, 0), (2 * BRICK, BRICK, BRICK)),
+        blob(rng, (4, 4, 4), (BRICK, 8, 8), METAL, op),
+    ]
+    cache = BrickCache()
+    first = VoxelNode.process(nodes, cache)
+    assert any(e.crop() != e.box for e in cache.entries.values())
+    again = VoxelNode.process(nodes, cache)
+    assert cache.hits == cache.misses
+    same(again, first)
+    same(again, VoxelNode.process(nodes))
@@ -0,0 +1,98 @@
+import numpy as np
+
+import source.ml.ga_2 as ga
+import source.math.voxels2truss as v2t
+import source.math.truss2stress as fem
+
+
+def genomes(count: int, seed: int = 1):
+    return ga.Genome.random(np.random.default_rng(seed), count)
+
+
+def test_analysis_reused(ga_config):
+    """ Rods over the static layer keep one pattern (identity rows) """
+    C = ga_config()
+    G = genomes(6)
+    for g, rod in zip(G, C.rods(G)):
+        C.evaluate(C.createPhenotype(g, rod))
+    assert C.incremental.stable
+    assert C.session.session.analysed == 1
+    assert C.session.session.reused == len(G) - 1
+
+
+def test_stable_system_matches_rebuild(ga_config):
+    C = ga_config()
+    G = genomes(4)
+    for g, rod in zip(G, C.rods(G)):
+        phenome = C.createPhenotype(g, rod)
+        truss, matrix = C.assemble(phenome)
+        _, E = fem.fem_simulate_loads(truss, matrix=matrix)
+        _, F = fem.fem_simulate_loads(v2t.voxels2truss(phenome))
+        # Same edges (incremental order differs)
+        assert np.allclose(np.sort(E[0]), np.sort(F[0]), rtol=1E-4, atol=1E-6)
+
+
+def test_pool_matches_serial(ga_config, tmp_path):
+    """ Workers rebuild the rods from the genomes alone """
+    fitness, solves = [], []
+    for workers in (0, 2):
+        G = ga.GA(ga_config(workers=workers, folder=str(tmp_path / str(workers))))
+        try:
+            G.step()
+            fitness.append([I.fitness for I in G.generation.population[:G.config.keep]])
+            # Worker solver counters are added up by the main process
+            solves.append(G.config.session.count)
+        finally:
+            G.close()
+    assert fitness[0] == fitness[1]
+    assert solves[0] == solves[1] == G.config.size
+
+
+def test_shared_assembly(ga_config):
+    """ Workers attach to the published base (no private copies) """
+    import pickle
+    import source.data.voxel_tree.shared as sh
+
+    C = ga_config()
+    C.shared = sh.SharedData.Publish(C.node.data)
+    C.assembly = sh.SharedObject.Publish(C.base_assembly())
+    try:
+        W = pickle.loads(pickle.dumps(C))
+        A = W.base_assembly()
+        # Base voxels referenced, truss arrays in their own blocks
+        assert sh.__views__[id(A.base.grid)] == C.shared.blocks[1]
+        assert not A.truss.nodes.flags.writeable
+        for g, rod in zip(genomes(2), C.rods(genomes(2))):
+            K = C.assemble(C.createPhenotype(g, rod))[1]
+            L = W.assemble(W.createPhenotype(g, rod))[1]
+            assert abs(K - L).max() == 0
+    finally:
+        C.shared.release()
+        C.assembly.release()
+
+
+def test_shared_released(ga_config, tmp_path):
+    """ The publisher views its own blocks & closes every map on release """
+    import source.data.voxel_tree.shared as sh
+
+    C = ga_config()
+    C.shared = sh.SharedData.Publish(C.node.data)
+    C.assembly = sh.SharedObject.Publish(C.base_assembly())
+    C.incremental = None
+    C.base_assembly()
+    C.join(C.rods(genomes(1))[0])
+    assert not sh.__attached__
+    C.tree = C.incremental = None
+    C.shared.release()
+    C.assembly.release()
+    assert not sh.__attached__ and not sh.__owned__
+
+    # A pool reset & close leaves no maps behind
+    G = ga.GA(ga_config(workers=2, folder=str(tmp_path / "pool")))
+    try:
+        G.step()
+        G.reset(G.config)
+        G.step()
+    finally:
+        G.close()
+    assert not sh.__attached__ and not sh.__owned__
@@ -0,0 +1,54 @@
+import numpy as np
+
+import source.ml.ga_2 as ga
+import source.ml.ga_storage as s
+from source.ml.ga_cache import FitnessCache
+from source.data.voxel_tree.box import Box
+from source.data.voxel_tree.data import Data
+
+
+def data(offset, mask):
+    mask = np.asarray(mask, np.bool_)
+    box = Box.OffsetShape(offset, mask.shape)
+    return Data(box, mask, mask.astype(np.uint32) * 4, mask * 15.0)
+
+
+def test_key():
+    A = data((0, 0, 0), [[[1, 0], [0, 1]]])
+    assert FitnessCache.key(A) == FitnessCache.key(data((0, 0, 0), [[[1, 0], [0, 1]]]))
+    assert FitnessCache.key(A) != FitnessCache.key(data((1, 0, 0), [[[1, 0], [0, 1]]]))
+    assert FitnessCache.key(A) != FitnessCache.key(data((0, 0, 0), [[[1, 1], [0, 1]]]))
+
+
+def test_lru_budget():
+    cost = FitnessCache(1 << 10).cost(b"k" * 20)
+    C = FitnessCache(cost * 2)
+    C.put(b"a" * 20, 1.0)
+    C.put(b"b" * 20, 2.0)
+    assert C.get(b"a" * 20) == 1.0
+    # "b" is the least recently used
+    C.put(b"c" * 20, 3.0)
+    assert C.get(b"b" * 20) is None
+    assert C.get(b"a" * 20) == 1.0
+    assert C.get(b"c" * 20) == 3.0
+    assert C.bytes <= C.budget
+
+
+def test_disabled():
+    C = FitnessCache(0)
+    C.put(b"a" * 20, 1.0)
+    assert C.get(b"a" * 20) is None
+
+
+def test_duplicate_rods_solved_once(ga_config):
+    """ Equal genomes are memoized by their rod voxels """
+    G = ga.GA(ga_config(cache=1 << 16))
+    try:
+        genomes = ga.Genome.random(np.random.default_rng(2), 3)
+        first = s.Induvidual.package(genomes)
+        assert G.evaluate(first) == 0
+        again = s.Induvidual.package(genomes * 2)
+        assert G.evaluate(again) == len(again)
+        assert [I.fitness for I in again] == [I.fitness for I in first] * 2
+    finally:
+        G.close()
@@ -0,0 +1,55 @@
+import numpy as np
+
+from source.math.rasterizers.hits import HitBuffer, resolve, segments
+
+
+def test_chunks():
+    """ Hits keep their order across full chunks """
+    H = HitBuffer(chunk=4)
+    H.add(1, 0.5)
+    H.extend(np.arange(2, 5), np.full(3, 1.5))
+    H.add(5, 2.5)
+    H.extend(np.arange(6, 16), np.full(10, 3.5))
+    P, Z = H.arrays()
+    assert len(H) == 15
+    assert np.array_equal(P, np.arange(1, 16))
+    assert np.array_equal(Z, [0.5] + [1.5] * 3 + [2.5] + [3.5] * 10)
+
+
+def test_empty():
+    H = HitBuffer()
+    assert len(H) == 0
+    assert not H.voxels((2, 3, 4)).any()
+
+
+def test_parity():
+    """ Voxel centers between pairs of hits are filled """
+    shape = (2, 2, 8)
+    H = HitBuffer()
+    # Column 0: one span, the entry hit twice (counted once)
+    H.extend(np.array([0, 0, 0]), np.array([5.7, 2.2, 2.2]))
+    # Column 1: two spans
+    H.extend(np.array([1, 1, 1, 1]), np.array([0.1, 1.6, 4.0, 8.0]))
+    # Column 2: a single hit (not watertight)
+    H.add(2, 3.0)
+    # Column 3: three hits (odd)
+    H.extend(np.array([3, 3, 3]), np.array([1.0, 2.0, 6.0]))
+    G = H.voxels(shape).reshape(4, 8)
+    assert np.array_equal(np.flatnonzero(G[0]), [2, 3, 4, 5])
+    assert np.array_equal(np.flatnonzero(G[1]), [0, 1, 4, 5, 6, 7])
+    assert not G[2].any()
+    # Odd columns are kept (w/o even) or left for repair
+    assert G[3].any()
+    E = resolve(*H.arrays(), shape, even=True).reshape(4, 8)
+    assert not E[3].any()
+    assert np.array_equal(E[:2], G[:2])
+
+
+def test_segments():
+    """ Spans of odd columns only (for repair) """
+    H = HitBuffer()
+    H.extend(np.array([0, 0, 3, 3, 3]), np.array([1.0, 4.0, 1.0, 2.0, 6.0]))
+    P, span0, span1 = segments(*H.arrays(), 8)
+    assert np.all(P == 3)
+    assert np.array_equal(span0, [0, 1, 2, 6])
+    assert np.array_equal(span1, [1, 2, 6, 8])
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import source.math.incremental as inc
+import source.math.truss2stress as fem
+import source.math.voxels2truss as v2t
+from source.data.voxel_tree.box import Box
+
+
+def variant(base, pad: int = 1):
+    """ The base grown by {pad} voxels (a bar on top), w/ a hole bored in """
+    V = base.__class__(tuple(np.add(base.grid.shape, (0, 0, pad))))
+    V.grid[..., :-pad] = base.grid
+    V.strength[..., :-pad] = base.strength
+    c = base.grid.shape[0] // 2
+    V.grid[c, :, -pad:] = V.grid[c, :, -pad - 1:-pad]
+    V.strength[c, :, -pad:] = 15.0
+    V.grid[c - 1:c + 1, c - 1:c + 1, 2:4] = 0
+    V.strength[c - 1:c + 1, c - 1:c + 1, 2:4] = 0.0
+    V.offset = base.offset
+    V.forces, V.statics, V.loads = base.forces, base.statics, base.loads
+    return V
+
+
+def by_coords(truss, D, offset):
+    """ Displacements of the existing nodes, by lattice coordinates """
+    C = np.floor(truss.nodes).astype(np.int64) + offset
+    keep = np.unique(truss.edges)
+    order = np.lexsort(C[keep].T)
+    return C[keep][order], D[keep][order]
+
+
+@pytest.mark.parametrize("region", [False, True])
+def test_update_matches_rebuild(column_voxels, region):
+    base = column_voxels(8)
+    V = variant(base)
+    # The bar on top (empty nodes are kept as identity rows)
+    R = Box.OffsetShape((4, 0, 8), (1, 8, 1)) if region else None
+    I = inc.Incremental(base, region=R)
+    assert I.stable
+    assert len(I.extra) == (8 if region else 0)
+    truss, K = I.update(V)
+    offset = np.asarray(V.offset, np.int64)
+
+    [A], _ = fem.fem_simulate_loads(truss, matrix=K)
+    F = v2t.voxels2truss(V)
+    [B], _ = fem.fem_simulate_loads(F)
+    CA, DA = by_coords(truss, A, offset)
+    CB, DB = by_coords(F, B, offset)
+    assert np.array_equal(CA, CB)
+    assert np.allclose(DA, DB, rtol=1E-4, atol=1E-6 * np.abs(DB).max())
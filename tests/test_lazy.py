@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from source.data.voxel_tree.lazy import LazyNode
+from source.data.voxel_tree.node import VoxelNode
+from source.data.voxel_tree.operation import Operation
+
+from .conftest import METAL, STATIC
+
+
+def same(A, B):
+    assert A.box == B.box
+    for a, b in zip(A.arrays(), B.arrays()):
+        assert np.array_equal(a, b)
+
+
+def nodes(blob, op: Operation, seed: int = 4):
+    rng = np.random.default_rng(seed)
+    return [
+        blob(rng, (0, 0, 0), (12, 10, 8)),
+        blob(rng, (6, 4, 2), (10, 4, 4), METAL),
+        blob(rng, (3, -2, 5), (4, 8, 6), STATIC, op),
+    ]
+
+
+@pytest.mark.parametrize("op", list(Operation))
+def test_evaluate_matches_process(blob, op):
+    """ Nested (flattened) expressions equal eager joins """
+    A, B, C = nodes(blob, op)
+    inner = VoxelNode.Parent(Operation.OVERWRITE, [A, B])
+    eager = VoxelNode.process([VoxelNode(Operation.OVERWRITE, inner.data), C])
+    lazy = LazyNode.Parent(Operation.OVERWRITE, [
+        LazyNode.Parent(Operation.OVERWRITE, [LazyNode.From(A), LazyNode.From(B)]),
+        LazyNode.From(C),
+    ])
+    same(lazy.evaluate(), eager)
+
+
+@pytest.mark.parametrize("op", list(Operation))
+def test_replace_matches_evaluate(blob, op):
+    """ Swapping a child reuses the rest & equals a fresh evaluation """
+    A, B, C = nodes(blob, op)
+    _, D, E = nodes(blob, op, seed=5)
+    tree = LazyNode.Parent(Operation.OVERWRITE, [LazyNode.From(A), LazyNode.From(B), LazyNode.From(C)])
+    tree.evaluate()
+    for index, node in ((1, D), (2, E), (2, VoxelNode.Empty())):
+        swapped = tree.replace(index, LazyNode.From(node))
+        children = [A, B, C]
+        children[index] = node
+        same(swapped.evaluate(), VoxelNode.process(children))
+
+
+def test_adopt(blob):
+    """ Adopted results are reused (never written) """
+    A, B, _ = nodes(blob, Operation.OVERWRITE)
+    tree = LazyNode.Parent(Operation.OVERWRITE, [LazyNode.From(A), LazyNode.From(VoxelNode.Empty())])
+    base = A.data
+    for a in base.arrays():
+        a.flags.writeable = False
+    tree.adopt(base)
+    same(tree.replace(1, LazyNode.From(B)).evaluate(), VoxelNode.process([A, B]))
+    same(tree.evaluate(), A.data)
+
+
+@pytest.mark.parametrize("op", [Operation.CUTOUT, Operation.INTERSECT])
+def test_empty_result(blob, op):
+    """ Joins without any voxels left are empty (lazy & eager) """
+    rng = np.random.default_rng(6)
+    A = blob(rng, (5, 5, 5), (4, 4, 4))
+    A.data.mask[...] = True
+    B = blob(rng, (5, 5, 5) if op == Operation.CUTOUT else (20, 20, 20), (4, 4, 4), op=op)
+    B.data.mask[...] = True
+    eager = VoxelNode.process([A, B])
+    assert eager.box.is_empty
+    tree = LazyNode.Parent(Operation.OVERWRITE, [LazyNode.From(A), LazyNode.From(VoxelNode.Empty())])
+    tree.evaluate()
+    lazy = tree.replace(1, LazyNode.From(B))
+    same(lazy.evaluate(), eager)
+    same(LazyNode.Parent(Operation.OVERWRITE, [LazyNode.From(A), LazyNode.From(B)]).evaluate(), eager)
+    # As a child of another join
+    C = blob(rng, (0, 0, 0), (6, 6, 6))
+    outer = LazyNode.Parent(Operation.OVERWRITE, [LazyNode.From(C), lazy])
+    same(outer.evaluate(), VoxelNode.process([C, VoxelNode(Operation.OVERWRITE, eager)]))
@@ -0,0 +1,44 @@
+import glm
+import numpy as np
+import pytest
+
+import source.math.mesh2voxels as m2v
+from source.data.mesh import Geometry, Mesh
+
+
+def box_mesh():
+    """ Closed unit cube (12 triangles) """
+    V = np.array(np.meshgrid([0, 1], [0, 1], [0, 1], indexing="ij"), np.float32).reshape(3, -1).T
+    Q = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+    I = np.array([(a, b, c, a, c, d) for a, b, c, d in Q], np.uint32).reshape(-1)
+    return Mesh(V, I, Geometry.Triangles)
+
+
+# Unit cube -> voxels [2, 7) x [1, 5) x [3, 9) of a (8, 6, 10) grid
+MATRIX = glm.translate(glm.vec3(2, 1, 3)) * glm.scale(glm.vec3(5, 4, 6))
+SHAPE = (8, 6, 10)
+
+
+def expected():
+    G = np.zeros(SHAPE, np.bool_)
+    G[2:7, 1:5, 3:9] = True
+    return G
+
+
+@pytest.mark.parametrize("single", [False, True])
+@pytest.mark.parametrize("workers", [1, 4])
+def test_box(single, workers):
+    G = m2v.mesh_to_voxels(box_mesh(), MATRIX, SHAPE, single, workers)
+    assert np.array_equal(G, expected())
+
+
+@pytest.mark.parametrize("single", [False, True])
+def test_no_pool_for_serial_work(monkeypatch, single):
+    """ One worker (or one task) runs inline, no executor """
+    def fail(*args, **kwargs):
+        raise AssertionError("executor created")
+    monkeypatch.setattr(m2v, "ThreadPoolExecutor", fail)
+    assert np.array_equal(m2v.mesh_to_voxels(box_mesh(), MATRIX, SHAPE, single, 1), expected())
+    if single:
+        # A single tile & nothing to repair
+        assert np.array_equal(m2v.mesh_to_voxels(box_mesh(), MATRIX, SHAPE, single, 8), expected())
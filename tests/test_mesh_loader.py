@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+import pytest
+
+import source.utils.mesh_loader as ml
+from source.data.mesh import Geometry, Mesh
+
+CUBE = """\
+v 0 0 0
+v 1 0 0
+v 1 1 0
+v 0 1 0
+v 0 0 1
+v 1 0 1
+v 1 1 1
+v 0 1 1
+f 1 3 2
+f 1 4 3
+f 5 6 7
+f 5 7 8
+f 1 2 6
+f 1 6 5
+f 2 3 7
+f 2 7 6
+f 3 4 8
+f 3 8 7
+f 4 1 5
+f 4 5 8
+"""
+
+
+def mesh(seed: int = 0):
+    rng = np.random.default_rng(seed)
+    V = rng.random((10, 3)).astype(np.float32)
+    I = rng.integers(0, 10, 18).astype(np.uint32)
+    return Mesh(V, I, Geometry.Triangles)
+
+
+def test_binary_round_trip(tmp_path):
+    file = str(tmp_path / "mesh.bin")
+    M = mesh()
+    ml.writeBinary(file, M)
+    R = ml.readBinary(file)
+    assert np.array_equal(R.vertices, M.vertices)
+    assert np.array_equal(R.indices, M.indices)
+    assert not R.vertices.flags.writeable
+    assert [f for f in os.listdir(tmp_path)] == ["mesh.bin"]
+
+
+@pytest.mark.parametrize("damage", ["truncate", "flip", "magic"])
+def test_binary_damaged(tmp_path, damage):
+    file = str(tmp_path / "mesh.bin")
+    ml.writeBinary(file, mesh())
+    data = bytearray(open(file, "rb").read())
+    if damage == "truncate":
+        data = data[:-3]
+    elif damage == "flip":
+        data[-1] ^= 0xFF
+    else:
+        data[:4] = b"NOPE"
+    open(file, "wb").write(bytes(data))
+    with pytest.raises(ValueError):
+        ml.readBinary(file)
+
+
+def test_cached_matches_parsed(tmp_path):
+    """ The binary file is written once (to the cache), then read instead of the OBJ """
+    folder = str(tmp_path / "cache")
+    file = tmp_path / "cube.obj"
+    file.write_text(CUBE)
+    parsed = ml.loadCached(str(file), folder)
+    binary = ml.binaryPath(str(file), folder)
+    assert os.path.dirname(binary) == folder and os.path.exists(binary)
+    assert sorted(os.listdir(tmp_path)) == ["cache", "cube.obj"]
+    cached = ml.loadCached(str(file), folder)
+    assert not cached.vertices.flags.writeable
+    assert np.array_equal(cached.vertices, parsed.vertices)
+    assert np.array_equal(cached.indices, parsed.indices)
+    # A changed source is converted again (new key)
+    file.write_text(CUBE + "# changed\n")
+    assert ml.binaryPath(str(file), folder) != binary
+    assert ml.loadCached(str(file), folder).vertices.flags.writeable
+    assert len(os.listdir(folder)) == 2
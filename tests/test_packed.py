@@ -0,0 +1,42 @@
+import numpy as np
+
+from source.data.voxel_tree.box import Box
+from source.data.voxel_tree.data import Data, Layout
+from source.data.voxel_tree.packed import PackedData
+
+
+def sample(shape=(9, 7, 13), seed: int = 3):
+    """ Sparse blob (odd last axis: a partial byte of bits) """
+    rng = np.random.default_rng(seed)
+    mask = np.zeros(shape, np.bool_)
+    mask[2:6, 1:5, 3:11] = rng.random((4, 4, 8)) < 0.5
+    layout = Layout.Compact(4)
+    material = np.where(mask, rng.integers(1, 4, shape), 0).astype(layout.material)
+    strength = np.where(mask, rng.random(shape), 0).astype(layout.strength)
+    return Data(Box.OffsetShape((4, -2, 1), shape), mask, material, strength)
+
+
+def test_round_trip():
+    D = sample()
+    P = PackedData.Pack(D)
+    U = P.unpack()
+    assert U.box == D.box
+    for a, b in zip(U.arrays(), D.arrays()):
+        assert a.dtype == b.dtype
+        assert np.array_equal(a, b)
+    assert P.nbytes < sum(a.nbytes for a in D.arrays())
+
+
+def test_any():
+    D = sample()
+    P = PackedData.Pack(D)
+    assert P.mask.any() == D.mask.any()
+    for axes in (0, 1, 2, (1, 2), (2, 0), (0, 1)):
+        assert np.array_equal(P.mask.any(axes), D.mask.any(axes))
+
+
+def test_crop():
+    D = sample()
+    assert PackedData.Pack(D).crop() == D.crop().box
+    E = Data.Empty(D.box)
+    assert PackedData.Pack(E).crop() == Box.Empty()
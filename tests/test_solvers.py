@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+import source.math.solvers as sv
+import source.math.truss2stress as fem
+import source.math.voxels2truss as v2t
+
+BACKENDS = [name for name, cls in sv.Solver.__all__.items() if cls.available()]
+
+
+def test_unknown():
+    with pytest.raises(KeyError):
+        sv.get("nope")
+
+
+@pytest.mark.parametrize("name", BACKENDS)
+def test_backends_agree(name, column_voxels):
+    """ Every installed backend solves the same truss alike """
+    T = v2t.voxels2truss(column_voxels(6))
+    D, _ = fem.fem_simulate(T, solver=sv.get("superlu"))
+    S = sv.get(name)
+    U, _ = fem.fem_simulate(T, solver=S)
+    assert S.NAME == name and S.count == 1
+    assert S.residual < 1E-6
+    assert np.allclose(U, D, rtol=1E-4, atol=1E-6 * np.abs(D).max())
+    assert np.all(U[T.static] == 0)
+
+
+@pytest.mark.parametrize("name", BACKENDS)
+def test_counters_merge(name, column_voxels):
+    """ Counters of other instances (ie. workers) add up """
+    T = v2t.voxels2truss(column_voxels(5))
+    main, worker = sv.get(name), sv.get(name)
+    for _ in range(2):
+        before = worker.counters()
+        fem.fem_simulate(T, solver=worker)
+        main.merge(worker.since(before))
+    assert main.counters() == pytest.approx(worker.counters())
+    assert main.stats() == worker.stats()
+
+
+@pytest.mark.skipif("pardiso" not in BACKENDS, reason="pypardiso not installed")
+def test_pardiso_without_internals(column_voxels):
+    """ Other pypardiso versions fall back to the public solve """
+    from source.math.pardiso import INTERNALS, Internals
+    assert Internals(object()).missing == list(INTERNALS)  # type: ignore
+    T = v2t.voxels2truss(column_voxels(5))
+    D, _ = fem.fem_simulate(T, solver=sv.get("superlu"))
+    S = sv.get("pardiso")
+    assert S.session.internals.available
+    S.session.internals.missing = ["_call_pardiso"]
+    with pytest.raises(RuntimeError, match="_call_pardiso"):
+        S.session.call(11, None, None)  # type: ignore
+    U, _ = fem.fem_simulate(T, solver=S)
+    assert np.allclose(U, D, rtol=1E-4, atol=1E-6 * np.abs(D).max())
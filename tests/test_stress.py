@@ -0,0 +1,43 @@
+import numpy as np
+
+import source.math.truss2stress as fem
+import source.math.voxels2truss as v2t
+
+
+def reference(truss, elasticity: float):
+    """ Dense stiffness matrix, one edge at a time (free axes) """
+    N = truss.nodes.astype(np.float64)
+    L, DOF = N.shape
+    K = np.zeros((L * DOF, L * DOF))
+    for (i, j), area in zip(truss.edges, truss.areas):
+        d = N[i] - N[j]
+        length = np.linalg.norm(d)
+        d /= length
+        k = np.outer(d, d) * area * elasticity / length
+        I = slice(i * DOF, i * DOF + DOF)
+        J = slice(j * DOF, j * DOF + DOF)
+        K[I, I] += k
+        K[J, J] += k
+        K[I, J] -= k
+        K[J, I] -= k
+    free = np.flatnonzero(~truss.static.ravel())
+    return K[np.ix_(free, free)]
+
+
+def test_matrix_matches_reference(column_voxels):
+    T = v2t.voxels2truss(column_voxels(5, hollow=True))
+    K = fem.stress_matrix(T, 1E9)
+    R = reference(T, 1E9)
+    assert K.has_sorted_indices
+    assert np.allclose(K.toarray(), R, rtol=1E-5, atol=1E-6 * np.abs(R).max())
+
+
+def test_operator_matches_matrix(column_voxels):
+    """ Matrix-free products equal the assembled matrix (free axes) """
+    T = v2t.voxels2truss(column_voxels(8))
+    K = fem.stress_matrix(T, 1E9)
+    A = fem.StressOperator(T, 1E9)
+    assert A.shape == K.shape
+    x = np.random.default_rng(0).random(K.shape[0])
+    y = K @ x
+    assert np.allclose(A @ x, y, rtol=1E-5, atol=1E-5 * np.abs(y).max())
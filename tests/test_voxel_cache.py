@@ -0,0 +1,62 @@
+import os
+
+import glm
+import numpy as np
+
+from source.utils.voxel_cache import VoxelCache
+
+
+def source(tmp_path, text: str = "v 0 0 0\n"):
+    path = tmp_path / "mesh.obj"
+    path.write_text(text)
+    return str(path)
+
+
+def test_round_trip(tmp_path):
+    C = VoxelCache(str(tmp_path / "cache"))
+    shape = (6, 5, 7)
+    grid = np.zeros(shape, np.bool_)
+    grid[1:4, 2:5, 3] = True
+    grid[2, 2, 6] = True
+    key = C.key(source(tmp_path), glm.mat4(), shape, 1, False)
+    assert C.get(key, shape) is None
+    C.put(key, grid)
+    assert np.array_equal(C.get(key, shape), grid)
+    # Stored cropped to the content
+    with np.load(C.path(key)) as F:
+        assert np.array_equal(F["start"], [1, 2, 3])
+        assert F["mask"].shape == (3, 3, 4)
+
+
+def test_empty_grid(tmp_path):
+    C = VoxelCache(str(tmp_path / "cache"))
+    key = C.key(source(tmp_path), glm.mat4(), (2, 2, 2))
+    C.put(key, np.zeros((2, 2, 2), np.bool_))
+    assert not C.get(key, (2, 2, 2)).any()
+
+
+def test_key(tmp_path):
+    file = source(tmp_path)
+    K = VoxelCache.key(file, glm.mat4(), (4, 4, 4))
+    assert K == VoxelCache.key(file, glm.mat4(), (4, 4, 4))
+    assert K != VoxelCache.key(file, glm.scale(glm.vec3(2)), (4, 4, 4))
+    assert K != VoxelCache.key(file, glm.mat4(), (4, 4, 5))
+    assert K != VoxelCache.key(file, glm.mat4(), (4, 4, 4), True)
+    # Content addressed (not by path)
+    with open(file, "a") as f:
+        f.write("v 1 1 1\n")
+    os.utime(file, ns=(1, 1))
+    assert K != VoxelCache.key(file, glm.mat4(), (4, 4, 4))
+
+
+def test_evict_least_recent(tmp_path):
+    C = VoxelCache(str(tmp_path / "cache"), budget=1 << 30)
+    rng = np.random.default_rng(0)
+    keys = [f"{k:040x}" for k in range(3)]
+    for k, key in enumerate(keys):
+        C.put(key, rng.random((16, 16, 16)) < 0.5)
+        os.utime(C.path(key), (k, k))
+    C.get(keys[0], (16, 16, 16))
+    C.budget = os.path.getsize(C.path(keys[0])) + os.path.getsize(C.path(keys[2]))
+    C.evict()
+    assert [os.path.exists(C.path(key)) for key in keys] == [True, False, True]
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+import source.math.voxels2truss as v2t
+
+
+def build(builder, voxels, exclude=()):
+    B = builder(voxels)
+    for kind in ("faces", "edges", "corners"):
+        if kind not in exclude:
+            B.run(getattr(v2t.TrussBuilder, kind.upper()))
+    return B.output()
+
+
+def rows(edges):
+    E = np.sort(edges, axis=1)
+    return E[np.lexsort(E.T[::-1])]
+
+
+@pytest.mark.parametrize("exclude", [(), ("corners",), ("edges", "corners")])
+def test_sparse_builder_matches_dense(column_voxels, exclude):
+    """ Same nodes (in C order), edges & constraints """
+    V = column_voxels(7, hollow=True)
+    D = build(v2t.TrussBuilder, V, exclude)
+    S = build(v2t.SparseTrussBuilder, V.sparse(), exclude)
+    for name in ("nodes", "forces", "static", "loads"):
+        assert np.array_equal(getattr(D, name), getattr(S, name)), name
+    assert np.array_equal(rows(D.edges), rows(S.edges))
+    assert np.array_equal(D.areas, S.areas)
+
+
+def test_dispatch(column_voxels):
+    """ Thin structures (in big boxes) take the sparse path, same truss """
+    C = column_voxels(6)
+    V = C.__class__((16, 16, 6))
+    V.grid[:6, :6] = C.grid
+    V.strength[:6, :6] = C.strength
+    V.forces, V.statics, V.loads = C.forces, C.statics, C.loads
+    assert np.count_nonzero(V.grid) < v2t.SPARSE_FILL * V.grid.size
+    T = v2t.voxels2truss(V)
+    D = build(v2t.TrussBuilder, V)
+    assert np.array_equal(T.nodes, D.nodes)
+    assert np.array_equal(rows(T.edges), rows(D.edges))
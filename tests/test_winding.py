@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from source.math.winding import Winding, inside, winding
+
+
+def sphere(n: int = 24, drop: float = 0.0, seed: int = 0):
+    """ Unit sphere triangles (w/ a fraction dropped: holes) """
+    u, v = np.meshgrid(np.linspace(0, 2 * np.pi, n + 1), np.linspace(0, np.pi, n + 1), indexing="ij")
+    P = np.stack([np.sin(v) * np.cos(u), np.sin(v) * np.sin(u), np.cos(v)], -1)
+    a, b, c, d = P[:-1, :-1], P[1:, :-1], P[1:, 1:], P[:-1, 1:]
+    T = np.concatenate([np.stack([a, b, c], -2), np.stack([a, c, d], -2)]).reshape(-1, 3, 3)
+    keep = np.random.default_rng(seed).random(len(T)) >= drop
+    return T[keep]
+
+
+def points(count: int = 500, seed: int = 1):
+    return np.random.default_rng(seed).uniform(-1.6, 1.6, (count, 3))
+
+
+@pytest.mark.parametrize("drop", [0.0, 0.02])
+def test_matches_exact(drop):
+    T, Q = sphere(drop=drop), points()
+    W = Winding(T, leaf=8)
+    assert W.depth > 2
+    assert np.abs(W(Q) - winding(T, Q)).max() < 0.05
+    assert np.array_equal(W.inside(Q), inside(T, Q))
+
+
+def test_converges():
+    """ Leaves only (a huge beta) is the exact sum """
+    T, Q = sphere(drop=0.05), points(100)
+    assert np.allclose(Winding(T, beta=1E6, leaf=8)(Q), winding(T, Q))
+
+
+def test_small():
+    """ Fewer triangles than a leaf, no triangles """
+    T, Q = sphere(4), points(50)
+    assert np.allclose(Winding(T)(Q), winding(T, Q))
+    assert not Winding(np.zeros((0, 3, 3)))(Q).any()